@@ -8,6 +8,12 @@ from PIL import Image, ImageTk
 import threading
 import time
 import random
+import heapq
+from bisect import bisect_right
+import itertools
+from collections import OrderedDict, deque
+from functools import partial
+from operator import attrgetter
 
 # Helper function for resource paths (PyInstaller compatibility)
 def resource_path(relative_path):
@@ -51,9 +57,52 @@ CAMERA_SPEED = 3
 TILE_SIZE = 20
 GROUND_Y = 560
 
+# Merge adjacent static blocks/spikes into larger rectangles at load
+MERGE_STATIC_TILES = True
+
+# Chunk streaming: static entities exist only in chunks near the camera
+STREAM_CHUNKS = True
+CHUNK_SIZE = 800
+CHUNK_LOAD_MARGIN = CHUNK_SIZE  # Chunks this close to the view are created
+CHUNK_UNLOAD_MARGIN = CHUNK_SIZE * 2  # Chunks further than this are released
+
+# Prepared levels kept in memory for restarts and level hotkeys
+LEVEL_CACHE_SIZE = 4
+
+# Time the main loop may spend on background tasks each frame
+TASK_BUDGET_MS = 4
+
+# Turbo (fast-forward) speeds cycled with Ctrl+Alt+T
+TURBO_FACTORS = (1, 4, 16)
+
+# Rewind history (hold Backspace): seconds kept and frames between full keyframes
+REWIND_SECONDS = 10
+REWIND_KEYFRAME_INTERVAL = FPS
+
 # Animation constants
 MOVE_ANIMATION_SPEED = 60  # pixels per second
 
+# Contact types (produced once per frame by Game.gather_contacts)
+CONTACT_SPIKE = "spike"
+CONTACT_TRIGGER = "trigger"
+CONTACT_FLAG = "flag"
+
+# Collision layers (bit flags) and the layers the player collides with
+LAYER_SOLID = 1
+LAYER_HAZARD = 2
+LAYER_DECORATION = 4
+LAYER_TRIGGER = 8
+PLAYER_COLLISION_MASK = LAYER_SOLID | LAYER_HAZARD
+
+# Collision layer for each object type
+OBJECT_COLLISION_LAYERS = {
+    "yellow_block": LAYER_SOLID,
+    "ground": LAYER_SOLID,
+    "spikes": LAYER_HAZARD,
+    "text": LAYER_DECORATION,
+    "trigger": LAYER_TRIGGER
+}
+
 # Colors
 WHITE = (255, 255, 255)
 SKY_BLUE_TOP = (87, 138, 230)
@@ -70,6 +119,22 @@ screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Dani's Platformer Adventure")
 clock = pygame.time.Clock()
 
+class GameClock:
+    """Simulation time source, advanced by a fixed step on every game update"""
+    def __init__(self, step_ms=1000 / FPS):
+        self.step_ms = step_ms
+        self.time_ms = 0.0
+    
+    def now(self):
+        return self.time_ms
+    
+    def tick(self):
+        self.time_ms += self.step_ms
+        return self.time_ms
+
+# Default clock shared by the game and its objects
+game_clock = GameClock()
+
 class Camera:
     def __init__(self):
         self.x = 0
@@ -78,9 +143,95 @@ class Camera:
     def update(self, target):
         # Follow the player with some offset
         self.x = target.rect.x - SCREEN_WIDTH // 3
+        # Scroll up once the player climbs into the top third; the ground stays at the bottom
+        self.y = min(0, target.rect.y - SCREEN_HEIGHT // 3)
         # Keep camera within bounds
         if self.x < 0:
             self.x = 0
+    
+    def view_rect(self):
+        return pygame.Rect(self.x, self.y, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+def normalize_object_id(obj_id):
+    """Normalise an object ID so JSON int ids and string action keys compare equal"""
+    return str(obj_id)
+
+def merge_static_rects(entries, tile_size=TILE_SIZE):
+    """Greedy-mesh grid aligned rects into maximal rectangles.
+    
+    Returns (merged, unaligned): merged is a list of (x, y, width, height),
+    unaligned holds the entries that are not on the tile grid and were left alone.
+    """
+    cells = set()
+    unaligned = []
+    for entry in entries:
+        x, y, width, height = entry["x"], entry["y"], entry["width"], entry["height"]
+        if x % tile_size or y % tile_size or width % tile_size or height % tile_size or width <= 0 or height <= 0:
+            unaligned.append(entry)
+            continue
+        for cell_x in range(x, x + width, tile_size):
+            for cell_y in range(y, y + height, tile_size):
+                cells.add((cell_x, cell_y))
+    
+    merged = []
+    # Scan row by row; each free cell starts a rect grown right, then down while whole rows fit
+    for cell_x, cell_y in sorted(cells, key=lambda cell: (cell[1], cell[0])):
+        if (cell_x, cell_y) not in cells:
+            continue  # Already covered by an earlier rect
+        
+        width = tile_size
+        while (cell_x + width, cell_y) in cells:
+            width += tile_size
+        
+        height = tile_size
+        while all((x, cell_y + height) in cells for x in range(cell_x, cell_x + width, tile_size)):
+            height += tile_size
+        
+        for x in range(cell_x, cell_x + width, tile_size):
+            for y in range(cell_y, cell_y + height, tile_size):
+                cells.discard((x, y))
+        merged.append((cell_x, cell_y, width, height))
+    
+    return merged, unaligned
+
+def swept_aabb(moving_rect, dx, dy, static_rect):
+    """Return (time_of_impact, normal_x, normal_y) for a rect moving by (dx, dy), or None if it misses"""
+    # Entry/exit times along X (fraction of the move)
+    if dx > 0:
+        tx_entry = (static_rect.left - moving_rect.right) / dx
+        tx_exit = (static_rect.right - moving_rect.left) / dx
+    elif dx < 0:
+        tx_entry = (static_rect.right - moving_rect.left) / dx
+        tx_exit = (static_rect.left - moving_rect.right) / dx
+    else:
+        # Not moving on this axis - must already overlap on it
+        if moving_rect.right <= static_rect.left or moving_rect.left >= static_rect.right:
+            return None
+        tx_entry, tx_exit = float('-inf'), float('inf')
+
+    # Entry/exit times along Y
+    if dy > 0:
+        ty_entry = (static_rect.top - moving_rect.bottom) / dy
+        ty_exit = (static_rect.bottom - moving_rect.top) / dy
+    elif dy < 0:
+        ty_entry = (static_rect.bottom - moving_rect.top) / dy
+        ty_exit = (static_rect.top - moving_rect.bottom) / dy
+    else:
+        if moving_rect.bottom <= static_rect.top or moving_rect.top >= static_rect.bottom:
+            return None
+        ty_entry, ty_exit = float('-inf'), float('inf')
+
+    entry_time = max(tx_entry, ty_entry)
+    exit_time = min(tx_exit, ty_exit)
+
+    # Miss if the axes never overlap at the same time, or the hit is outside this step
+    # (entry_time < 0 means already overlapping - the discrete resolvers handle that)
+    if entry_time >= exit_time or entry_time < 0 or entry_time > 1:
+        return None
+
+    if tx_entry > ty_entry:
+        return entry_time, (-1 if dx > 0 else 1), 0
+    return entry_time, 0, (-1 if dy > 0 else 1)
 
 class Player(pygame.sprite.Sprite):
     def __init__(self, x, y):
@@ -97,15 +248,23 @@ class Player(pygame.sprite.Sprite):
         self.rect.y = y
         self.vel_y = 0
         self.on_ground = False
+        # Pixel mask for precise spike collision (computed once)
+        self.mask = pygame.mask.from_surface(self.image)
+        # Spikes hit during the last update, reported to the game as spike contacts
+        self.spike_hits = []
     
-    def update(self, platforms, camera, game_objects=None):
+    def update(self, platforms, camera, game_objects=None, ground=None):
         keys = pygame.key.get_pressed()
+        self.spike_hits = []
         
         # Combine platforms and game_objects for collision detection
         all_platforms = list(platforms)
         if game_objects:
             # Add visible game objects that can be collided with
             for obj in game_objects.values():
+                # Decorations and triggers never enter the collision path
+                if not getattr(obj, 'collision_layer', LAYER_SOLID) & PLAYER_COLLISION_MASK:
+                    continue
                 if getattr(obj, 'is_visible', True) and getattr(obj, 'visible', True):
                     # Create a temporary platform-like object for collision
                     temp_platform = type('TempPlatform', (), {
@@ -117,13 +276,18 @@ class Player(pygame.sprite.Sprite):
                         'is_moving': getattr(obj, 'is_moving', False),
                         'move_velocity_y': getattr(obj, 'move_velocity_y', 0),
                         'move_velocity_x': getattr(obj, 'move_velocity_x', 0),
-                        'spike': getattr(obj, 'spike', False)
+                        'spike': getattr(obj, 'spike', False),
+                        'tile_size': getattr(obj, 'tile_size', TILE_SIZE),
+                        'source': obj
                     })()
                     all_platforms.append(temp_platform)
         
+        # Catch moving platforms that jumped over the player during a long frame
+        self._check_mover_sweeps(all_platforms)
+
         # Store old position for collision detection
         old_rect = self.rect.copy()
-        
+
         # Handle input and movement
         horizontal_input = 0
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
@@ -139,27 +303,36 @@ class Player(pygame.sprite.Sprite):
         # Apply gravity
         self.vel_y += GRAVITY
         
-        # Move horizontally first
+        # Move horizontally first (swept, so thin walls can't be skipped)
         if horizontal_input != 0:
-            self.rect.x += horizontal_input * PLAYER_SPEED
-            
+            self._continuous_move(all_platforms, horizontal_input * PLAYER_SPEED, 0)
+
         # Check for horizontal collisions and wall pushing
-        collision_result = self._handle_horizontal_collisions(all_platforms, old_rect, horizontal_input)
-        if collision_result == "death":
-            return "death"
-        
-        # Move vertically
-        self.rect.y += self.vel_y
-        
+        self._handle_horizontal_collisions(all_platforms, old_rect, horizontal_input)
+
+        # Move vertically (same truncation as rect.y += vel_y)
+        target_rect = self.rect.copy()
+        target_rect.y += self.vel_y
+        self._continuous_move(all_platforms, 0, target_rect.y - self.rect.y)
+
         # Check for vertical collisions
-        collision_result = self._handle_vertical_collisions(all_platforms, old_rect)
-        if collision_result == "death":
-            return "death"
+        self._handle_vertical_collisions(all_platforms, old_rect)
+        
+        # Ground has its own resolution through the interval index
+        if ground:
+            self._handle_ground_collisions(ground, old_rect)
+            pinch_candidates = all_platforms + ground.segments_in_range(self.rect.left, self.rect.right)
+        else:
+            pinch_candidates = all_platforms
         
         # Check for pinch detection (being squeezed by moving platforms)
-        if self._check_pinch_detection(all_platforms, old_rect):
+        if self._check_pinch_detection(pinch_candidates, old_rect):
             return "pinch"
         
+        # Die as soon as the player can no longer get out of a pit
+        if ground and self._committed_to_pit(ground, all_platforms):
+            return "pit"
+        
         # Prevent player from going too far left
         if self.rect.left < 0:
             self.rect.left = 0
@@ -169,7 +342,143 @@ class Player(pygame.sprite.Sprite):
             return "death"
             
         return False
+
+    def _sweep(self, platforms, dx, dy):
+        """Find the first solid platform hit while moving by (dx, dy) as (toi, normal_x, normal_y, platform),
+        and a spike whose pixels the player crosses on the way (or None) - spikes never block"""
+        # Broadphase: only platforms touching the swept area can be hit
+        end_rect = self.rect.move(dx, dy)
+        swept_area = self.rect.union(end_rect)
+        first_hit = None
+        spike_hit = None
+        for platform in platforms:
+            if not getattr(platform, 'is_visible', True):
+                continue
+            if not swept_area.colliderect(platform.rect):
+                continue
+            if getattr(platform, 'obj_type', None) == "spikes":
+                if spike_hit is None and spike_swept_hit(self.rect, self.mask, dx, dy, platform.rect,
+                                                         getattr(platform, 'tile_size', TILE_SIZE)):
+                    spike_hit = platform
+                continue
+
+            hit = swept_aabb(self.rect, dx, dy, platform.rect)
+            if hit and (first_hit is None or hit[0] < first_hit[0]):
+                first_hit = (hit[0], hit[1], hit[2], platform)
+        return first_hit, spike_hit
+
+    def _continuous_move(self, platforms, dx, dy):
+        """Move the player by (dx, dy) without tunnelling through thin platforms or spikes"""
+        if dx == 0 and dy == 0:
+            return None
+
+        hit, spike_hit = self._sweep(platforms, dx, dy)
+        if spike_hit:
+            self.hit_spike(spike_hit)
+        if hit:
+            toi, normal_x, normal_y, platform = hit
+            # If the discrete step would jump over the platform, stop 1px inside it
+            # so the regular collision resolvers see the contact as usual
+            if not self.rect.move(dx, dy).colliderect(platform.rect):
+                if normal_x == -1:
+                    dx = platform.rect.left - self.rect.right + 1
+                elif normal_x == 1:
+                    dx = platform.rect.right - self.rect.left - 1
+                elif normal_y == -1:
+                    dy = platform.rect.top - self.rect.bottom + 1
+                elif normal_y == 1:
+                    dy = platform.rect.bottom - self.rect.top - 1
+
+        self.rect.x += dx
+        self.rect.y += dy
+        return None
+
+    def _handle_ground_collisions(self, ground, old_rect):
+        """Resolve collisions against the ground segments under the player"""
+        ground_top = ground.ground_y
+        if self.rect.bottom <= ground_top:
+            return
+        
+        segments = ground.segments_in_range(self.rect.left, self.rect.right)
+        
+        # Crossed the surface this frame (even if the step went past the ground) - land on it
+        if segments and old_rect.bottom <= ground_top:
+            self.rect.bottom = ground_top
+            self.vel_y = 0
+            self.on_ground = True
+            return
+        
+        # Below the surface inside a pit - the pit walls block sideways movement
+        for segment in segments:
+            if self.rect.colliderect(segment.rect):
+                if self.rect.centerx < segment.rect.centerx:
+                    self.rect.right = segment.rect.left
+                else:
+                    self.rect.left = segment.rect.right
     
+    def _committed_to_pit(self, ground, platforms):
+        """Check if the player is falling inside a pit with nothing left to land on"""
+        if self.vel_y <= 0 or self.rect.top <= ground.ground_y:
+            return False
+        
+        # Whole body must be inside one pit
+        pit = ground.pit_at(self.rect.left)
+        if not pit or self.rect.right > pit[1]:
+            return False
+        
+        # Anything solid below the player inside the pit could still catch them
+        for platform in platforms:
+            if (getattr(platform, 'is_visible', True) and
+                getattr(platform, 'obj_type', None) != "spikes" and
+                platform.rect.top >= self.rect.bottom and
+                platform.rect.left < self.rect.right and platform.rect.right > self.rect.left):
+                return False
+        return True
+    
+    def _check_mover_sweeps(self, platforms):
+        """Push the player (or record a spike hit) when a mover passed through them since last frame"""
+        for platform in platforms:
+            if not (getattr(platform, 'is_visible', True) and getattr(platform, 'is_moving', False)):
+                continue
+
+            move_dx = round(getattr(platform, 'move_velocity_x', 0))
+            move_dy = round(getattr(platform, 'move_velocity_y', 0))
+            if move_dx == 0 and move_dy == 0:
+                continue
+
+            # Overlaps at the end of the step are handled by the regular pushing logic
+            if self.rect.colliderect(platform.rect):
+                continue
+
+            prev_rect = platform.rect.move(-move_dx, -move_dy)
+            if not prev_rect.union(platform.rect).colliderect(self.rect):
+                continue
+
+            # Sweep the player through the mover's frame of reference
+            if getattr(platform, 'obj_type', None) == "spikes":
+                if spike_swept_hit(self.rect, self.mask, -move_dx, -move_dy, prev_rect,
+                                   getattr(platform, 'tile_size', TILE_SIZE)):
+                    self.hit_spike(platform)
+                continue
+            hit = swept_aabb(self.rect, -move_dx, -move_dy, prev_rect)
+            if not hit:
+                continue
+
+            _, normal_x, normal_y = hit
+            if normal_x == -1:
+                self.rect.right = platform.rect.left
+            elif normal_x == 1:
+                self.rect.left = platform.rect.right
+            elif normal_y == -1:
+                self.rect.bottom = platform.rect.top
+                self.vel_y = 0
+                self.on_ground = True
+            elif normal_y == 1:
+                self.rect.top = platform.rect.bottom
+                self.vel_y = max(1, move_dy)
+
+        return None
+
     def _handle_horizontal_collisions(self, platforms, old_rect, horizontal_input):
         """Handle horizontal movement collisions and wall pushing"""
         for platform in platforms:
@@ -177,9 +486,11 @@ class Player(pygame.sprite.Sprite):
                 continue
                 
             if self.rect.colliderect(platform.rect):
-                # Check for spike collision
+                # Check for spike collision (gaps between spike tips are not solid)
                 if hasattr(platform, 'obj_type') and platform.obj_type == "spikes":
-                    return "death"
+                    if self._touches_spike(platform):
+                        self.hit_spike(platform)
+                    continue
                 
                 # Determine collision side based on movement direction and overlap
                 if horizontal_input > 0:  # Moving right, hit left side of platform
@@ -210,9 +521,11 @@ class Player(pygame.sprite.Sprite):
                 continue
                 
             if self.rect.colliderect(platform.rect):
-                # Check for spike collision
+                # Check for spike collision (gaps between spike tips are not solid)
                 if hasattr(platform, 'obj_type') and platform.obj_type == "spikes":
-                    return "death"
+                    if self._touches_spike(platform):
+                        self.hit_spike(platform)
+                    continue
                 
                 # Determine collision direction
                 if self.vel_y > 0:  # Falling down, hit top of platform
@@ -260,8 +573,21 @@ class Player(pygame.sprite.Sprite):
         
         return None
     
+    def hit_spike(self, platform):
+        """Record a spike hit; the game turns it into a spike contact and decides on death there"""
+        spike = getattr(platform, 'source', platform)
+        if not any(hit is spike for hit in self.spike_hits):
+            self.spike_hits.append(spike)
+    
+    def _touches_spike(self, platform):
+        """Pixel-precise spike test for a spike whose box overlaps the player"""
+        return spike_pixels_hit(self.rect, self.mask, platform.rect, getattr(platform, 'tile_size', TILE_SIZE))
+    
     def _check_pinch_detection(self, platforms, old_rect):
         """Check if player is being pinched between moving platforms"""
+        # Spikes are handled by the pixel test, they never pinch
+        platforms = [platform for platform in platforms if getattr(platform, 'obj_type', None) != "spikes"]
+        
         # Get all platforms currently colliding with player
         colliding_platforms = []
         for platform in platforms:
@@ -308,6 +634,45 @@ class Player(pygame.sprite.Sprite):
         
         return False
 
+class GroundIndex:
+    """Sorted ground segments and pits answering 'ground under x' / 'pit under x' with bisect"""
+    def __init__(self, segments=(), pits=(), ground_y=GROUND_Y):
+        self.ground_y = ground_y
+        self.segments = sorted(segments, key=lambda segment: segment.rect.left)  # Ground Platforms
+        self.segment_starts = [segment.rect.left for segment in self.segments]
+        # (start, end) spans; overlapping or touching pits form one gap in the ground, so merge them
+        self.pits = []
+        for start, end in sorted((pit["x"], pit["x"] + pit["width"]) for pit in pits):
+            if self.pits and start <= self.pits[-1][1]:
+                self.pits[-1] = (self.pits[-1][0], max(self.pits[-1][1], end))
+            else:
+                self.pits.append((start, end))
+        self.pit_starts = [start for start, _ in self.pits]
+    
+    def ground_at(self, x):
+        """Return the ground segment under x, or None"""
+        i = bisect_right(self.segment_starts, x) - 1
+        if i >= 0 and x < self.segments[i].rect.right:
+            return self.segments[i]
+        return None
+    
+    def pit_at(self, x):
+        """Return the (start, end) pit under x, or None"""
+        i = bisect_right(self.pit_starts, x) - 1
+        if i >= 0 and x < self.pits[i][1]:
+            return self.pits[i]
+        return None
+    
+    def segments_in_range(self, left, right):
+        """Return the ground segments overlapping [left, right)"""
+        i = max(bisect_right(self.segment_starts, left) - 1, 0)
+        result = []
+        while i < len(self.segments) and self.segments[i].rect.left < right:
+            if self.segments[i].rect.right > left:
+                result.append(self.segments[i])
+            i += 1
+        return result
+
 class Tile:
     """Individual tile for tile-based rendering"""
     @staticmethod
@@ -333,23 +698,89 @@ class Tile:
         pygame.draw.circle(surface, BLACK, (center_x, center_y), 2, 1)
     
     @staticmethod
-    def draw_spike_tile(surface, x, y):
+    def draw_spike_tile(surface, x, y, size=TILE_SIZE):
         """Draw a single spike tile"""
         # Draw spike base
-        pygame.draw.rect(surface, (64, 64, 64), (x, y + TILE_SIZE - 4, TILE_SIZE, 4))
+        pygame.draw.rect(surface, (64, 64, 64), (x, y + size - 4, size, 4))
         
         # Draw spikes
-        spike_width = TILE_SIZE // 4
+        spike_width = size // 4
         for i in range(4):
             spike_x = x + (i * spike_width)
             points = [
-                (spike_x, y + TILE_SIZE),
+                (spike_x, y + size),
                 (spike_x + spike_width // 2, y),
-                (spike_x + spike_width, y + TILE_SIZE)
+                (spike_x + spike_width, y + size)
             ]
             pygame.draw.polygon(surface, (128, 128, 128), points)
             pygame.draw.polygon(surface, BLACK, points, 1)
 
+# Pixel masks of a single spike tile, keyed by tile size
+SPIKE_MASK_CACHE = {}
+
+def get_spike_mask(tile_size=TILE_SIZE):
+    """Return the cached pixel mask of one spike tile"""
+    mask = SPIKE_MASK_CACHE.get(tile_size)
+    if mask is None:
+        surface = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+        Tile.draw_spike_tile(surface, 0, 0, tile_size)
+        mask = pygame.mask.from_surface(surface)
+        SPIKE_MASK_CACHE[tile_size] = mask
+    return mask
+
+def spike_pixels_hit(player_rect, player_mask, spike_rect, tile_size=TILE_SIZE):
+    """Cheap box test first, then a mask test against only the spike tiles the player overlaps"""
+    if not player_rect.colliderect(spike_rect):
+        return False
+    
+    tile_mask = get_spike_mask(tile_size)
+    overlap = player_rect.clip(spike_rect)
+    first_col = (overlap.left - spike_rect.left) // tile_size
+    last_col = (overlap.right - 1 - spike_rect.left) // tile_size
+    first_row = (overlap.top - spike_rect.top) // tile_size
+    last_row = (overlap.bottom - 1 - spike_rect.top) // tile_size
+    
+    for col in range(first_col, last_col + 1):
+        tile_x = spike_rect.left + col * tile_size
+        for row in range(first_row, last_row + 1):
+            tile_y = spike_rect.top + row * tile_size
+            if tile_mask.overlap(player_mask, (player_rect.x - tile_x, player_rect.y - tile_y)):
+                return True
+    return False
+
+def spike_swept_hit(player_rect, player_mask, dx, dy, spike_rect, tile_size=TILE_SIZE):
+    """Pixel spike test along a move of (dx, dy): every pixel step is tested, so a move that
+    passes a spike box's empty corner is no hit while one that crosses its tips still is"""
+    if not player_rect.union(player_rect.move(dx, dy)).colliderect(spike_rect):
+        return False
+    steps = max(abs(dx), abs(dy), 1)
+    for step in range(1, steps + 1):
+        moved = player_rect.move(dx * step // steps, dy * step // steps)
+        if spike_pixels_hit(moved, player_mask, spike_rect, tile_size):
+            return True
+    return False
+
+# Move track modes: play once, restart from the start, or go back and forth
+MOVE_ONCE = "once"
+MOVE_LOOP = "loop"
+MOVE_PING_PONG = "ping_pong"
+
+def track_progress(elapsed_ms, duration_ms, mode=MOVE_ONCE):
+    """Closed-form track position: (progress 0..1 along the path, completed cycle count)"""
+    if duration_ms <= 0:
+        return 1.0, 1
+    elapsed_ms = max(elapsed_ms, 0)
+    cycle, phase_ms = divmod(elapsed_ms, duration_ms)
+    cycle = int(cycle)
+    if mode == MOVE_LOOP:
+        return phase_ms / duration_ms, cycle
+    if mode == MOVE_PING_PONG:
+        # Odd cycles run backwards
+        progress = phase_ms / duration_ms
+        return (1.0 - progress if cycle % 2 else progress), cycle
+    # One-shot: clamp at the end
+    return min(elapsed_ms / duration_ms, 1.0), cycle
+
 class GameObject(pygame.sprite.Sprite):
     def __init__(self, x, y, width, height, obj_type="yellow_block", obj_id=None):
         super().__init__()
@@ -361,14 +792,19 @@ class GameObject(pygame.sprite.Sprite):
         self.world_x = x
         self.world_y = y
         self.obj_id = obj_id or f"{obj_type}_{x}_{y}"
+        self.collision_layer = OBJECT_COLLISION_LAYERS.get(obj_type, LAYER_SOLID)
+        self.clock = game_clock  # Replaced by the owning game's clock in build_registry
         
         # Animation properties
         self.target_x = x
         self.target_y = y
         self.move_duration = 0
         self.move_start_time = 0
+        self.move_mode = MOVE_ONCE
+        self.move_cycle = 0  # Completed track cycles, used to spot loop restarts
         self.is_moving = False
         self.is_visible = True
+        self.visible = True
         
         # Movement direction tracking
         self.prev_x = x
@@ -379,23 +815,35 @@ class GameObject(pygame.sprite.Sprite):
         # Create collision rect
         self.rect = pygame.Rect(x, y, width, height)
     
+    def position_at(self, time_ms):
+        """Evaluate the current move track at any simulation time in O(1)"""
+        progress, cycle = track_progress(time_ms - self.move_start_time, self.move_duration * 1000, self.move_mode)
+        
+        # Linear interpolation
+        x = self.original_x + (self.target_x - self.original_x) * progress
+        y = self.original_y + (self.target_y - self.original_y) * progress
+        return x, y, cycle
+    
     def update_position(self, dt):
         """Update position if object is moving"""
         if self.is_moving:
-            elapsed = pygame.time.get_ticks() - self.move_start_time
-            progress = min(elapsed / (self.move_duration * 1000), 1.0)
+            new_x, new_y, cycle = self.position_at(self.clock.now())
             
             # Store previous position
             self.prev_x = self.world_x
             self.prev_y = self.world_y
             
-            # Linear interpolation
-            new_x = self.original_x + (self.target_x - self.original_x) * progress
-            new_y = self.original_y + (self.target_y - self.original_y) * progress
-            
-            # Calculate movement velocity (pixels per frame)
-            self.move_velocity_x = new_x - self.world_x
-            self.move_velocity_y = new_y - self.world_y
+            if self.move_mode == MOVE_LOOP and cycle != self.move_cycle:
+                # Looping back to the start is a jump, not a sweep through the level
+                self.prev_x = new_x
+                self.prev_y = new_y
+                self.move_velocity_x = 0
+                self.move_velocity_y = 0
+            else:
+                # Calculate movement velocity (pixels per frame)
+                self.move_velocity_x = new_x - self.world_x
+                self.move_velocity_y = new_y - self.world_y
+            self.move_cycle = cycle
             
             # Update positions
             self.world_x = new_x
@@ -410,7 +858,8 @@ class GameObject(pygame.sprite.Sprite):
                 self.rect.x = self.world_x
                 self.rect.y = self.world_y
             
-            if progress >= 1.0:
+            # Only one-shot moves finish; loops and ping-pongs run forever
+            if self.move_mode == MOVE_ONCE and cycle >= 1:
                 self.is_moving = False
                 self.original_x = self.target_x
                 self.original_y = self.target_y
@@ -436,10 +885,15 @@ class GameObject(pygame.sprite.Sprite):
                 self.rect.y = -1000
             print(f"Object {getattr(self, 'obj_id', 'unknown')} disappeared (visibility: {self.is_visible}, {self.visible})")
         elif action == "move":
+            # A new move starts from wherever the object is now
+            self.original_x = self.world_x
+            self.original_y = self.world_y
             self.target_x = kwargs.get("target_x", self.world_x)
             self.target_y = kwargs.get("target_y", self.world_y)
             self.move_duration = kwargs.get("duration", 2.0)
-            self.move_start_time = pygame.time.get_ticks()
+            self.move_mode = kwargs.get("mode", MOVE_ONCE)
+            self.move_cycle = 0
+            self.move_start_time = self.clock.now()
             self.is_moving = True
             # Reset movement tracking
             self.prev_x = self.world_x
@@ -485,12 +939,49 @@ class TriggerBox(GameObject):
         self.triggered = False
         self.enabled = True  # Whether this trigger is currently active
         self.trigger_actions = {}  # obj_id: {"action": "move", "target_x": x, "target_y": y, "duration": 2.0}
+        # Compiled at load by Game.compile_trigger_actions
+        self.immediate_actions = []  # CompiledAction list run as soon as the trigger fires
+        self.delayed_actions = []  # CompiledAction list scheduled on the game's delay queue
         # Ensure position attributes exist
         self.current_x = x
         self.current_y = y
         self.world_x = x
         self.world_y = y
 
+class CompiledAction:
+    """Trigger action resolved to its target entity at load time - firing just calls run()"""
+    __slots__ = ("action_type", "target", "delay_ms", "run")
+    
+    def __init__(self, action_type, target, action_data):
+        self.action_type = action_type
+        self.target = target
+        self.delay_ms = int(action_data.get("delay", 0.0) * 1000)  # Convert seconds to milliseconds
+        
+        # Bind the work up front so no dict lookups or string compares happen when firing
+        if action_type == "enable":
+            self.run = self._enable_trigger
+        elif action_type == "disable":
+            self.run = self._disable_trigger
+        elif action_type == "move":
+            move_kwargs = {"duration": action_data.get("duration", 2.0)}
+            # Missing coordinates fall back to the object's position when the move starts
+            if "target_x" in action_data:
+                move_kwargs["target_x"] = action_data["target_x"]
+            if "target_y" in action_data:
+                move_kwargs["target_y"] = action_data["target_y"]
+            if action_data.get("mode", MOVE_ONCE) != MOVE_ONCE:
+                move_kwargs["mode"] = action_data["mode"]
+            self.run = partial(target.trigger_action, "move", **move_kwargs)
+        else:
+            self.run = partial(target.trigger_action, action_type)
+    
+    def _enable_trigger(self):
+        self.target.enabled = True
+        self.target.triggered = False  # Reset triggered state when enabled
+    
+    def _disable_trigger(self):
+        self.target.enabled = False
+
 class Flag(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
@@ -647,11 +1138,335 @@ def set_music_volume(volume):
     pygame.mixer.music.set_volume(BG_MUSIC_VOLUME)
     print(f"Music volume set to {BG_MUSIC_VOLUME}")
 
+class TaskScheduler:
+    """Cooperative generator jobs, stepped round-robin by the main loop within a per-frame time budget"""
+    def __init__(self, budget_ms=TASK_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.tasks = deque()  # (name, generator, on_done)
+    
+    def add(self, job, name="task", on_done=None):
+        """Queue a generator; on_done receives its return value when it finishes"""
+        self.tasks.append((name, job, on_done))
+        return job
+    
+    def cancel(self, name):
+        """Drop every queued task with this name"""
+        for task in [task for task in self.tasks if task[0] == name]:
+            self.tasks.remove(task)
+            task[1].close()
+    
+    def run_slice(self):
+        """Step tasks until the budget is spent or none are left; returns the number of steps taken"""
+        if not self.tasks:
+            return 0
+        
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        steps = 0
+        while self.tasks:
+            name, job, on_done = self.tasks[0]
+            try:
+                next(job)
+            except StopIteration as finished:
+                self.tasks.popleft()
+                if on_done:
+                    on_done(finished.value)
+            except Exception as e:
+                self.tasks.popleft()
+                print(f"Task {name} failed: {e}")
+            else:
+                self.tasks.rotate(-1)  # Let the next task have a turn
+            steps += 1
+            
+            if time.perf_counter() >= deadline:
+                break
+        return steps
+
+class LevelCache:
+    """LRU of prepared (parsed and merged) levels, filled on demand or by background prefetch threads"""
+    def __init__(self, prepare, capacity=LEVEL_CACHE_SIZE):
+        self.prepare = prepare  # map_name -> prepared level data (must not touch pygame)
+        self.capacity = capacity
+        self.levels = OrderedDict()  # map_name -> (file mtime, prepared level)
+        self.pending = {}  # map_name -> prefetch Thread
+        self.failed = {}  # map_name -> file mtime a prefetch failed on (None: file missing)
+        self.lock = threading.Lock()
+    
+    def map_mtime(self, map_name):
+        try:
+            return os.path.getmtime(os.path.join(executable_dir_path("maps"), f"{map_name}.json"))
+        except OSError:
+            return None
+    
+    def lookup(self, map_name):
+        """Return the cached level if the file hasn't changed since it was prepared"""
+        with self.lock:
+            entry = self.levels.get(map_name)
+            if entry is None:
+                return None
+            if entry[0] != self.map_mtime(map_name):
+                del self.levels[map_name]  # Edited since - prepare it again
+                return None
+            self.levels.move_to_end(map_name)
+            return entry[1]
+    
+    def store(self, map_name, mtime, prepared):
+        with self.lock:
+            self.failed.pop(map_name, None)
+            self.levels[map_name] = (mtime, prepared)
+            self.levels.move_to_end(map_name)
+            while len(self.levels) > self.capacity:
+                self.levels.popitem(last=False)
+    
+    def get(self, map_name):
+        """Prepared level, waiting for a running prefetch or preparing it here if needed"""
+        thread = self.pending.get(map_name)
+        if thread:
+            thread.join()
+        
+        prepared = self.lookup(map_name)
+        if prepared is None:
+            mtime = self.map_mtime(map_name)
+            prepared = self.prepare(map_name)  # Errors reach the caller
+            self.store(map_name, mtime, prepared)
+        return prepared
+    
+    def prefetch(self, map_name):
+        """Prepare a level on a background thread unless it is cached or already on its way"""
+        if map_name in self.pending or map_name in self.levels:
+            return  # Freshness is checked when the level is actually loaded
+        if map_name in self.failed and self.failed[map_name] == self.map_mtime(map_name):
+            return  # Broken and unchanged since - don't re-read it every menu frame
+        thread = threading.Thread(target=self._prefetch, args=(map_name,), daemon=True)
+        self.pending[map_name] = thread
+        thread.start()
+    
+    def _prefetch(self, map_name):
+        mtime = self.map_mtime(map_name)
+        try:
+            self.store(map_name, mtime, self.prepare(map_name))
+        except Exception:
+            # Any broken map (missing, bad JSON, missing keys) - load_map reports the problem
+            # when the level is actually started
+            with self.lock:
+                self.failed[map_name] = mtime
+        finally:
+            self.pending.pop(map_name, None)
+
+def chunk_range(left, top, right, bottom, chunk_size=CHUNK_SIZE):
+    """All chunk keys covering a world rectangle (right/bottom exclusive)"""
+    return {(chunk_x, chunk_y)
+            for chunk_x in range(left // chunk_size, (right - 1) // chunk_size + 1)
+            for chunk_y in range(top // chunk_size, (bottom - 1) // chunk_size + 1)}
+
+class ChunkStreamer:
+    """Static entity records bucketed by world chunk; entities exist only while one of their chunks is active"""
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunks = {}  # (chunk_x, chunk_y) -> list of record indices
+        self.records = []  # (map data, factory) per streamed entity
+        self.active_chunks = set()
+        self.live = {}  # record index -> entity
+    
+    def clear(self):
+        self.chunks.clear()
+        self.records.clear()
+        self.active_chunks = set()
+        self.live = {}
+    
+    def chunk_range(self, left, top, right, bottom):
+        return chunk_range(left, top, right, bottom, self.chunk_size)
+    
+    def add(self, data, factory, chunk_keys):
+        """Register an entity to be built by factory(data) when one of its chunks becomes active"""
+        index = len(self.records)
+        self.records.append((data, factory))
+        for key in chunk_keys:
+            self.chunks.setdefault(key, []).append(index)
+    
+    def update(self, view):
+        """Activate chunks near the view; return (spawned, released) entities"""
+        near = self.chunk_range(view.left - CHUNK_LOAD_MARGIN, view.top - CHUNK_LOAD_MARGIN,
+                                view.right + CHUNK_LOAD_MARGIN, view.bottom + CHUNK_LOAD_MARGIN)
+        keep = self.chunk_range(view.left - CHUNK_UNLOAD_MARGIN, view.top - CHUNK_UNLOAD_MARGIN,
+                                view.right + CHUNK_UNLOAD_MARGIN, view.bottom + CHUNK_UNLOAD_MARGIN)
+        # Hysteresis: chunks between the two margins keep their current state
+        active = (self.active_chunks & keep) | (near & self.chunks.keys())
+        if active == self.active_chunks:
+            return (), ()
+        self.active_chunks = active
+        
+        needed = set()
+        for key in active:
+            needed.update(self.chunks[key])
+        
+        released = [self.live.pop(index) for index in list(self.live) if index not in needed]
+        spawned = []
+        for index in needed:
+            if index not in self.live:
+                data, factory = self.records[index]
+                entity = factory(data)
+                self.live[index] = entity
+                spawned.append(entity)
+        return spawned, released
+
+class RewindBuffer:
+    """Bounded per-frame history of the mutable game state, stored as deltas against periodic keyframes"""
+    # Everything a trigger action or a move can change on an object
+    OBJECT_FIELDS = ("world_x", "world_y", "current_x", "current_y", "original_x", "original_y",
+                     "target_x", "target_y", "move_duration", "move_start_time", "move_mode", "move_cycle", "is_moving",
+                     "is_visible", "visible", "prev_x", "prev_y", "move_velocity_x", "move_velocity_y",
+                     "rect.x", "rect.y")
+    object_state = attrgetter(*OBJECT_FIELDS)
+    
+    def __init__(self, capacity=REWIND_SECONDS * FPS, keyframe_interval=REWIND_KEYFRAME_INTERVAL):
+        self.frames = deque(maxlen=capacity)
+        self.keyframe_interval = keyframe_interval
+        self.objects = []  # Objects targeted by a trigger action - nothing else ever changes
+        self.triggers = []
+        self.keyframe = None
+        self.frames_since_keyframe = 0
+        self.capture_ms = 0.0  # Smoothed cost of one capture
+        # Running size of the history, kept up to date as frames come and go
+        self.history_bytes = 0
+        self.keyframe_refs = {}  # id(keyframe) -> [frames using it, its size]
+    
+    def reset(self, objects, triggers):
+        """Drop the history and track a new level's dynamic entities"""
+        self.frames.clear()
+        self.objects = list(objects)
+        self.triggers = list(triggers)
+        self.keyframe = None
+        self.frames_since_keyframe = 0
+        self.history_bytes = 0
+        self.keyframe_refs.clear()
+    
+    @staticmethod
+    def frame_size(player_state, camera_state, object_changes, trigger_changes, delayed):
+        size = sys.getsizeof(player_state) + sys.getsizeof(camera_state)
+        size += sys.getsizeof(object_changes) + sys.getsizeof(trigger_changes)
+        size += sum(sys.getsizeof(state) for _, state in object_changes)
+        if delayed is not None:
+            size += sys.getsizeof(delayed)
+        return size
+    
+    @staticmethod
+    def keyframe_size(keyframe):
+        key_objects, key_triggers, key_delayed = keyframe
+        size = sys.getsizeof(key_objects) + sum(sys.getsizeof(state) for state in key_objects)
+        return size + sys.getsizeof(key_triggers) + sys.getsizeof(key_delayed)
+    
+    def add_frame(self, frame):
+        if len(self.frames) == self.frames.maxlen:
+            self.drop_frame(self.frames.popleft())
+        self.frames.append(frame)
+        self.history_bytes += frame[-1]
+        
+        keyframe = frame[0]
+        refs = self.keyframe_refs.get(id(keyframe))
+        if refs is None:
+            refs = self.keyframe_refs[id(keyframe)] = [0, self.keyframe_size(keyframe)]
+            self.history_bytes += refs[1]
+        refs[0] += 1
+    
+    def drop_frame(self, frame):
+        """Account for a frame leaving the history (its keyframe goes with its last frame)"""
+        self.history_bytes -= frame[-1]
+        refs = self.keyframe_refs[id(frame[0])]
+        refs[0] -= 1
+        if refs[0] == 0:
+            self.history_bytes -= refs[1]
+            del self.keyframe_refs[id(frame[0])]
+    
+    def capture(self, game):
+        """Record the state at the end of a frame"""
+        start = time.perf_counter()
+        
+        object_states = [self.object_state(obj) for obj in self.objects]
+        trigger_states = [(trigger.triggered, trigger.enabled) for trigger in self.triggers]
+        delayed = tuple(game.delayed_actions)
+        
+        if self.keyframe is None or self.frames_since_keyframe >= self.keyframe_interval:
+            self.keyframe = (object_states, trigger_states, delayed)
+            self.frames_since_keyframe = 0
+            object_changes = trigger_changes = ()
+            delayed = None
+        else:
+            key_objects, key_triggers, key_delayed = self.keyframe
+            object_changes = tuple((index, state) for index, state in enumerate(object_states)
+                                   if state != key_objects[index])
+            trigger_changes = tuple((index, state) for index, state in enumerate(trigger_states)
+                                    if state != key_triggers[index])
+            if delayed == key_delayed:
+                delayed = None  # Same queue as the keyframe
+        self.frames_since_keyframe += 1
+        
+        player = game.player
+        player_state = (player.rect.x, player.rect.y, player.vel_y, player.on_ground)
+        camera_state = (game.camera.x, game.camera.y)
+        self.add_frame((
+            self.keyframe,
+            player_state,
+            camera_state,
+            game.game_clock.time_ms,
+            object_changes,
+            trigger_changes,
+            delayed,
+            self.frame_size(player_state, camera_state, object_changes, trigger_changes, delayed)
+        ))
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.capture_ms = self.capture_ms * 0.9 + elapsed_ms * 0.1
+    
+    def rewind(self, game):
+        """Restore the most recent frame in place and drop it; False when the history is empty"""
+        if not self.frames:
+            return False
+        
+        frame = self.frames.pop()
+        self.drop_frame(frame)
+        keyframe, player_state, camera_state, time_ms, object_changes, trigger_changes, delayed, _ = frame
+        key_objects, key_triggers, key_delayed = keyframe
+        
+        object_states = list(key_objects)
+        for index, state in object_changes:
+            object_states[index] = state
+        for obj, state in zip(self.objects, object_states):
+            for field, value in zip(self.OBJECT_FIELDS[:-2], state):
+                setattr(obj, field, value)
+            obj.rect.x, obj.rect.y = state[-2:]
+        
+        trigger_states = list(key_triggers)
+        for index, state in trigger_changes:
+            trigger_states[index] = state
+        for trigger, (triggered, enabled) in zip(self.triggers, trigger_states):
+            trigger.triggered = triggered
+            trigger.enabled = enabled
+        
+        # Heap order is preserved by the copy
+        game.delayed_actions[:] = key_delayed if delayed is None else delayed
+        
+        player = game.player
+        player.rect.x, player.rect.y, player.vel_y, player.on_ground = player_state
+        game.camera.x, game.camera.y = camera_state
+        game.game_clock.time_ms = time_ms
+        game.contacts = []
+        
+        # Start a fresh keyframe so new frames don't compare against a discarded future
+        self.keyframe = None
+        return True
+    
+    def memory_bytes(self):
+        """Approximate memory held by the history (keyframes counted once)"""
+        return sys.getsizeof(self.frames) + self.history_bytes
+
 class Game:
-    def __init__(self):
+    def __init__(self, clock=None):
+        self.game_clock = clock or game_clock
+        self.turbo_factor = 1  # Simulation updates per rendered frame
         self.camera = Camera()
         self.player = Player(100, 300)
         self.platforms = []
+        self.ground = GroundIndex()  # Ground segments and pits, rebuilt on every load
         self.trigger_boxes = []
         self.text_elements = []
         self.game_objects = {}  # obj_id: GameObject mapping
@@ -673,39 +1488,182 @@ class Game:
             self.health_icon = None
         
         # Delayed action system
-        self.delayed_actions = []  # List of (execution_time, action_data, obj_id_str)
-    
-    def check_if_should_start_invisible(self, obj_id, map_data):
-        """Check if an object should start invisible because it has an 'appear' action"""
-        trigger_boxes = map_data.get("trigger_boxes", [])
-        for trigger in trigger_boxes:
-            actions = trigger.get("actions", {})
-            for target_id, action_data in actions.items():
-                if str(target_id) == str(obj_id):
-                    # Handle both single action (dict) and multiple actions (list)
-                    actions_list = []
-                    if isinstance(action_data, dict):
-                        actions_list = [action_data]
-                    elif isinstance(action_data, list):
-                        actions_list = action_data
-                    
-                    # Check if any action is "appear"
-                    for action in actions_list:
-                        if action.get("action") == "appear":
-                            return True
-        return False
+        self.delayed_actions = []  # Heap of (execution_time, sequence, CompiledAction)
+        self.delayed_action_seq = itertools.count()
+        
+        # ID registries (normalised ID -> entity), rebuilt on every load
+        self.object_registry = {}
+        self.trigger_registry = {}
+        self.collision_objects = {}  # Subset of game_objects on the player's collision layers
+        
+        # Contacts gathered this frame: list of (contact_type, entity)
+        self.contacts = []
+        
+        # Recent frames for rewinding in place
+        self.rewind_buffer = RewindBuffer()
         
+        # Unreferenced static entities, created near the camera only
+        self.chunk_streamer = ChunkStreamer()
+        
+        # Background jobs serviced by the main loop; the sky gradient is baked there
+        self.task_scheduler = TaskScheduler()
+        self.sky_surface = None
+        self.task_scheduler.add(self.bake_sky(), "bake_sky", on_done=self.set_sky_surface)
+        self.appear_targets = set()  # Normalised IDs that start invisible, set per load
+        
+        # Parsed and merged levels, prefetched while the menu is open
+        self.level_cache = LevelCache(self.prepare_map)
+    
+    def collect_appear_targets(self, map_data):
+        """Return the normalised IDs of objects that should start invisible because they have an 'appear' action"""
+        appear_targets = set()
+        for trigger in map_data.get("trigger_boxes", []):
+            for target_id, action_data in trigger.get("actions", {}).items():
+                # Handle both single action (dict) and multiple actions (list)
+                actions_list = []
+                if isinstance(action_data, dict):
+                    actions_list = [action_data]
+                elif isinstance(action_data, list):
+                    actions_list = action_data
+                
+                # Check if any action is "appear"
+                for action in actions_list:
+                    if action.get("action") == "appear":
+                        appear_targets.add(normalize_object_id(target_id))
+        return appear_targets
+    
+    def collect_referenced_ids(self, map_data):
+        """Return the normalised IDs of every object a trigger action points at"""
+        return {normalize_object_id(target_id)
+                for trigger in map_data.get("trigger_boxes", [])
+                for target_id in trigger.get("actions", {})}
+    
+    def merge_static_entries(self, entries, referenced_ids, obj_type, default_height):
+        """Merge unreferenced static entries into maximal rectangles, keeping trigger targets as they are"""
+        if not MERGE_STATIC_TILES:
+            return entries
+        
+        kept = []
+        mergeable = []
+        for entry in entries:
+            if "id" in entry and normalize_object_id(entry["id"]) in referenced_ids:
+                kept.append(entry)  # Triggers must still resolve this ID
+            elif entry.get("tile_size", TILE_SIZE) != TILE_SIZE:
+                kept.append(entry)  # Strips with their own tile size keep their look
+            else:
+                mergeable.append({"x": entry["x"], "y": entry["y"], "width": entry["width"],
+                                  "height": entry.get("height", default_height)})
+        
+        merged, unaligned = merge_static_rects(mergeable)
+        # Greedy meshing can split overlapping shapes into more pieces - keep the originals then
+        if len(merged) + len(unaligned) >= len(mergeable):
+            return entries
+        
+        for x, y, width, height in merged:
+            kept.append({"x": x, "y": y, "width": width, "height": height, "id": f"merged_{obj_type}_{x}_{y}"})
+        kept.extend(unaligned)
+        
+        print(f"Merged {len(mergeable)} static {obj_type} entries into {len(merged) + len(unaligned)} colliders")
+        return kept
+    
+    def build_registry(self):
+        """Map normalised IDs to entities so trigger targets resolve in O(1)"""
+        self.object_registry = {normalize_object_id(obj.obj_id): obj for obj in self.game_objects.values()}
+        self.trigger_registry = {normalize_object_id(trigger.obj_id): trigger for trigger in self.trigger_boxes}
+        # Only objects on a layer the player collides with are handed to the physics
+        self.collision_objects = {obj_id: obj for obj_id, obj in self.game_objects.items()
+                                  if obj.collision_layer & PLAYER_COLLISION_MASK}
+        
+        for obj in self.game_objects.values():
+            obj.clock = self.game_clock
+        
+        for trigger in self.trigger_boxes:
+            self.compile_trigger_actions(trigger)
+        
+        # Only action targets can change during play, so only they are snapshotted
+        action_targets = {}
+        for trigger in self.trigger_boxes:
+            for action in trigger.immediate_actions + trigger.delayed_actions:
+                if not isinstance(action.target, TriggerBox):
+                    action_targets[id(action.target)] = action.target
+        self.rewind_buffer.reset(action_targets.values(), self.trigger_boxes)
+    
+    def compile_trigger_actions(self, trigger):
+        """Resolve a trigger's raw JSON actions into immediate and delayed CompiledAction lists"""
+        trigger.immediate_actions = []
+        trigger.delayed_actions = []
+        
+        for target_id, action_data in trigger.trigger_actions.items():
+            # Handle both single action (old format) and multiple actions (new format)
+            actions_list = []
+            if isinstance(action_data, dict):
+                actions_list = [action_data]  # Single action
+            elif isinstance(action_data, list):
+                actions_list = action_data  # Multiple actions
+            
+            for single_action in actions_list:
+                action_type = single_action.get("action", "appear")
+                if action_type in ["enable", "disable"]:
+                    target = self.trigger_registry.get(target_id)
+                else:
+                    target = self.object_registry.get(target_id)
+                
+                # Report broken links now rather than when the trigger fires
+                if target is None:
+                    print(f"Warning: Trigger {trigger.obj_id} targets missing object {target_id} for action {action_type}")
+                    continue
+                
+                compiled = CompiledAction(action_type, target, single_action)
+                if compiled.delay_ms > 0:
+                    trigger.delayed_actions.append(compiled)
+                else:
+                    trigger.immediate_actions.append(compiled)
+    
+    def prepare_map(self, map_name):
+        """Parse a map and precompute its entity data; pure data work, safe on a background thread"""
+        map_path = os.path.join(executable_dir_path("maps"), f"{map_name}.json")
+        with open(map_path, 'r') as f:
+            map_data = json.load(f)
+        
+        # Static blocks and spikes that no trigger references get merged
+        referenced_ids = self.collect_referenced_ids(map_data)
+        spike_entries = map_data.get("spikes", []) + map_data.get("spike_strips", [])
+        blocks = self.merge_static_entries(map_data.get("yellow_blocks", []), referenced_ids, "yellow_block", 40)
+        spikes = self.merge_static_entries(spike_entries, referenced_ids, "spikes", 20)
+        
+        # Entity lists of (map data, chunk keys or None when resident)
+        return {
+            "map_data": map_data,
+            "appear_targets": self.collect_appear_targets(map_data),
+            "yellow_blocks": self.plan_entities(blocks, referenced_ids, 40),
+            "spikes": self.plan_entities(spikes, referenced_ids, 20),
+            "text_elements": self.plan_entities(map_data.get("text_elements", []), referenced_ids, 20)
+        }
+    
+    def prefetch_selected_level(self):
+        """Warm the cache with the level highlighted in the menu"""
+        if self.menu.levels:
+            self.level_cache.prefetch(self.menu.levels[self.menu.selected_level - 1]["file"])
+    
     def load_map(self, map_name):
         map_path = os.path.join(executable_dir_path("maps"), f"{map_name}.json")
+        load_start = time.perf_counter()
         try:
-            with open(map_path, 'r') as f:
-                map_data = json.load(f)
+            # Prepared data is shared with the cache and must only be read
+            prepared = self.level_cache.get(map_name)
+            map_data = prepared["map_data"]
             
             # Clear existing objects
             self.platforms.clear()
             self.trigger_boxes.clear()
             self.text_elements.clear()
             self.game_objects.clear()
+            self.chunk_streamer.clear()
+            # Pending delayed actions belong to the previous level state
+            self.delayed_actions.clear()
+            
+            # Objects with an 'appear' action start invisible
+            self.appear_targets = prepared["appear_targets"]
             
             # Get level width from flag position or use default
             flag_data = map_data.get("flag", {"x": 2000})
@@ -714,55 +1672,13 @@ class Game:
             # Create continuous ground with pits
             self.create_ground_with_pits(level_width, map_data.get("pits", []))
             
-            # Load yellow block platforms
-            for platform_data in map_data.get("yellow_blocks", []):
-                height = platform_data.get("height", 40)
-                obj_id = platform_data.get("id", f"block_{platform_data['x']}_{platform_data['y']}")
-                platform = Platform(
-                    platform_data["x"],
-                    platform_data["y"],
-                    platform_data["width"],
-                    height,
-                    "yellow_block",
-                    obj_id
-                )
-                # Check if this object has an 'appear' action - if so, start invisible
-                should_start_invisible = self.check_if_should_start_invisible(obj_id, map_data)
-                if should_start_invisible:
-                    platform.is_visible = False
-                    platform.visible = False
-                    platform.rect.x = -1000  # Move off screen
-                    platform.rect.y = -1000
-                    print(f"Object {obj_id} starting invisible (has appear action)")
-                
-                self.platforms.append(platform)
-                self.game_objects[obj_id] = platform
-            
-            # Load spikes
-            for spike_data in map_data.get("spikes", []):
-                height = spike_data.get("height", 20)
-                obj_id = spike_data.get("id", f"spike_{spike_data['x']}_{spike_data['y']}")
-                spike = Platform(
-                    spike_data["x"],
-                    spike_data["y"],
-                    spike_data["width"],
-                    height,
-                    "spikes",
-                    obj_id
-                )
-                spike.spike = True  # Mark as spike for collision detection
-                
-                # Check if this object has an 'appear' action - if so, start invisible
-                should_start_invisible = self.check_if_should_start_invisible(obj_id, map_data)
-                if should_start_invisible:
-                    spike.is_visible = False
-                    spike.visible = False
-                    spike.rect.x = -1000  # Move off screen
-                    spike.rect.y = -1000
-                    print(f"Spike {obj_id} starting invisible (has appear action)")
-                
-                self.platforms.append(spike)
-                self.game_objects[obj_id] = spike
+            # Load yellow block platforms (merged when prepared)
+            for platform_data, chunk_keys in prepared["yellow_blocks"]:
+                self.place_entity(platform_data, self.build_block, chunk_keys)
+            
+            # Load spikes and spike strips (one rect plus tile size each)
+            for spike_data, chunk_keys in prepared["spikes"]:
+                self.place_entity(spike_data, self.build_spike, chunk_keys)
             
             # Load trigger boxes
             for trigger_data in map_data.get("trigger_boxes", []):
@@ -774,45 +1690,36 @@ class Game:
                     trigger_data["height"],
                     obj_id
                 )
-                trigger.trigger_actions = trigger_data.get("actions", {})
+                # Normalise action keys once (JSON keys are always strings, IDs may be ints)
+                trigger.trigger_actions = {normalize_object_id(target_id): action_data
+                                           for target_id, action_data in trigger_data.get("actions", {}).items()}
                 trigger.enabled = trigger_data.get("enabled", True)  # Load enabled state from JSON
                 trigger.triggered = False
                 self.trigger_boxes.append(trigger)
                 # Don't add to game_objects as they're invisible
             
             # Load text elements
-            for text_data in map_data.get("text_elements", []):
-                obj_id = text_data.get("id", f"text_{text_data['x']}_{text_data['y']}")
-                text_element = TextElement(
-                    text_data["x"],
-                    text_data["y"],
-                    text_data["width"],
-                    text_data["height"],
-                    text_data["text"],
-                    obj_id
-                )
-                # Check if this text has an 'appear' action - if so, start invisible
-                should_start_invisible = self.check_if_should_start_invisible(obj_id, map_data)
-                if should_start_invisible:
-                    text_element.is_visible = False
-                    text_element.visible = False
-                    print(f"Text element {obj_id} starting invisible (has appear action)")
-                
-                self.text_elements.append(text_element)
-                self.game_objects[obj_id] = text_element
+            for text_data, chunk_keys in prepared["text_elements"]:
+                self.place_entity(text_data, self.build_text, chunk_keys)
             
             # Load flag
             if flag_data:
                 self.flag = Flag(flag_data["x"], SCREEN_HEIGHT - 120)
             
+            self.build_registry()
+            
             # Set player start position
             start_pos = map_data.get("start_position", {"x": 100, "y": SCREEN_HEIGHT - 100})
             self.player.rect.x = start_pos["x"]
             self.player.rect.y = start_pos["y"]
             self.player.vel_y = 0
             self.camera.x = 0  # Reset camera position
+            self.camera.y = 0
+            self.stream_chunks()
             
-            print(f"Loaded map: {map_name}")
+            load_ms = (time.perf_counter() - load_start) * 1000
+            print(f"Loaded map: {map_name} in {load_ms:.1f} ms ({len(self.collision_objects)} colliders, "
+                  f"{len(self.chunk_streamer.records)} streamed)")
             
         except FileNotFoundError:
             print(f"Map file {map_path} not found. Creating default map.")
@@ -821,6 +1728,119 @@ class Game:
             print(f"Error reading map file {map_path}. Creating default map.")
             self.create_default_map()
     
+    def build_block(self, platform_data):
+        """Create a yellow block platform from map data"""
+        height = platform_data.get("height", 40)
+        obj_id = platform_data.get("id", f"block_{platform_data['x']}_{platform_data['y']}")
+        platform = Platform(
+            platform_data["x"],
+            platform_data["y"],
+            platform_data["width"],
+            height,
+            "yellow_block",
+            obj_id
+        )
+        # Check if this object has an 'appear' action - if so, start invisible
+        if normalize_object_id(obj_id) in self.appear_targets:
+            platform.is_visible = False
+            platform.visible = False
+            platform.rect.x = -1000  # Move off screen
+            platform.rect.y = -1000
+            print(f"Object {obj_id} starting invisible (has appear action)")
+        return platform
+    
+    def build_spike(self, spike_data):
+        """Create a spike or spike strip from map data"""
+        height = spike_data.get("height", 20)
+        obj_id = spike_data.get("id", f"spike_{spike_data['x']}_{spike_data['y']}")
+        spike = Platform(
+            spike_data["x"],
+            spike_data["y"],
+            spike_data["width"],
+            height,
+            "spikes",
+            obj_id
+        )
+        spike.spike = True  # Mark as spike for collision detection
+        spike.tile_size = spike_data.get("tile_size", TILE_SIZE)
+        
+        # Check if this object has an 'appear' action - if so, start invisible
+        if normalize_object_id(obj_id) in self.appear_targets:
+            spike.is_visible = False
+            spike.visible = False
+            spike.rect.x = -1000  # Move off screen
+            spike.rect.y = -1000
+            print(f"Spike {obj_id} starting invisible (has appear action)")
+        return spike
+    
+    def build_text(self, text_data):
+        """Create a text element from map data"""
+        obj_id = text_data.get("id", f"text_{text_data['x']}_{text_data['y']}")
+        text_element = TextElement(
+            text_data["x"],
+            text_data["y"],
+            text_data["width"],
+            text_data["height"],
+            text_data["text"],
+            obj_id
+        )
+        # Check if this text has an 'appear' action - if so, start invisible
+        if normalize_object_id(obj_id) in self.appear_targets:
+            text_element.is_visible = False
+            text_element.visible = False
+            print(f"Text element {obj_id} starting invisible (has appear action)")
+        return text_element
+    
+    def plan_entities(self, entries, referenced_ids, default_height):
+        """Pair each entry with its chunk keys, or None for entities that must stay resident"""
+        planned = []
+        for data in entries:
+            if STREAM_CHUNKS and normalize_object_id(data.get("id")) not in referenced_ids:
+                left, top = data["x"], data["y"]
+                bottom = top + data.get("height", default_height)
+                planned.append((data, chunk_range(left, top, left + data["width"], bottom)))
+            else:
+                planned.append((data, None))  # Trigger targets must keep their state
+        return planned
+    
+    def place_entity(self, data, factory, chunk_keys):
+        """Create resident entities now and hand the rest to the chunk streamer"""
+        if chunk_keys is None:
+            self.add_entity(factory(data))
+        else:
+            self.chunk_streamer.add(data, factory, chunk_keys)
+    
+    def add_entity(self, entity):
+        """Register a created entity with the draw lists, the object map and the physics"""
+        if entity.obj_type == "text":
+            self.text_elements.append(entity)
+        else:
+            self.platforms.append(entity)
+        self.game_objects[entity.obj_id] = entity
+        entity.clock = self.game_clock
+        if entity.collision_layer & PLAYER_COLLISION_MASK:
+            self.collision_objects[entity.obj_id] = entity
+    
+    def remove_entity(self, entity):
+        """Drop a streamed-out entity from everything add_entity registered it with"""
+        if entity.obj_type == "text":
+            self.text_elements.remove(entity)
+        else:
+            self.platforms.remove(entity)
+        # IDs aren't guaranteed unique (the editor defaults to 0), so only drop this entity's own entries
+        if self.game_objects.get(entity.obj_id) is entity:
+            del self.game_objects[entity.obj_id]
+        if self.collision_objects.get(entity.obj_id) is entity:
+            del self.collision_objects[entity.obj_id]
+    
+    def stream_chunks(self):
+        """Create entities in chunks the camera approaches and release those it left behind"""
+        spawned, released = self.chunk_streamer.update(self.camera.view_rect())
+        for entity in released:
+            self.remove_entity(entity)
+        for entity in spawned:
+            self.add_entity(entity)
+    
     def create_ground_with_pits(self, level_width, pits):
         """Create continuous ground with gaps for pits"""
         ground_height = 40
@@ -831,6 +1851,7 @@ class Game:
         
         # Create ground segments between pits
         current_x = 0
+        segments = []
         
         for pit in sorted_pits:
             pit_start = pit["x"]
@@ -839,15 +1860,18 @@ class Game:
             # Create ground segment before this pit
             if current_x < pit_start:
                 segment_width = pit_start - current_x
-                self.platforms.append(Platform(current_x, ground_y, segment_width, ground_height, "ground"))
+                segments.append(Platform(current_x, ground_y, segment_width, ground_height, "ground"))
             
-            # Skip the pit area
-            current_x = pit_start + pit_width
+            # Skip the pit area (overlapping pits must not move us backwards)
+            current_x = max(current_x, pit_start + pit_width)
         
         # Create final ground segment after last pit
         if current_x < level_width:
             final_width = level_width - current_x
-            self.platforms.append(Platform(current_x, ground_y, final_width, ground_height, "ground"))
+            segments.append(Platform(current_x, ground_y, final_width, ground_height, "ground"))
+        
+        # Ground stays out of the generic platform list - it is resolved through the index
+        self.ground = GroundIndex(segments, sorted_pits, ground_y)
     
     def start_level(self, level_name):
         self.current_map = level_name
@@ -1095,6 +2119,7 @@ class Game:
             self.platforms.append(platform)
         
         self.flag = Flag(1400, SCREEN_HEIGHT - 120)
+        self.build_registry()
     
     def draw_hearts(self):
         """Draw character icons for lives in top right corner"""
@@ -1124,7 +2149,28 @@ class Game:
                     color = (100, 100, 100)
                 pygame.draw.rect(screen, color, (x, y, icon_size, icon_size))
     
+    def bake_sky(self, rows_per_step=100):
+        """Task: render the sky gradient onto a surface a few rows at a time"""
+        surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        for y in range(SCREEN_HEIGHT):
+            ratio = y / SCREEN_HEIGHT
+            r = int(SKY_BLUE_TOP[0] * (1 - ratio) + SKY_BLUE_BOTTOM[0] * ratio)
+            g = int(SKY_BLUE_TOP[1] * (1 - ratio) + SKY_BLUE_BOTTOM[1] * ratio)
+            b = int(SKY_BLUE_TOP[2] * (1 - ratio) + SKY_BLUE_BOTTOM[2] * ratio)
+            pygame.draw.line(surface, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+            if y % rows_per_step == rows_per_step - 1:
+                yield
+        return surface.convert()
+    
+    def set_sky_surface(self, surface):
+        self.sky_surface = surface
+    
     def draw_sky(self):
+        # Baked gradient once the background task has finished
+        if self.sky_surface:
+            screen.blit(self.sky_surface, (0, 0))
+            return
+        
         # Draw gradient sky
         for y in range(SCREEN_HEIGHT):
             ratio = y / SCREEN_HEIGHT
@@ -1135,33 +2181,32 @@ class Game:
     
     def update(self):
         if self.game_state == "playing":
-            dt = clock.get_time() / 1000.0  # Delta time in seconds
+            # Advance simulation time by one fixed step
+            current_time = self.game_clock.tick()
+            dt = self.game_clock.step_ms / 1000.0  # Delta time in seconds
             
-            # Process delayed actions
-            current_time = pygame.time.get_ticks()
-            actions_to_execute = [action for action in self.delayed_actions if current_time >= action[0]]
-            for execution_time, action_data, obj_id_str in actions_to_execute:
-                self.execute_trigger_action(action_data, obj_id_str)
-                self.delayed_actions.remove((execution_time, action_data, obj_id_str))
+            # Process delayed actions that are due (heap ordered by execution time)
+            while self.delayed_actions and self.delayed_actions[0][0] <= current_time:
+                _, _, action = heapq.heappop(self.delayed_actions)
+                action.run()
             
             # Update all game objects
             for obj in self.game_objects.values():
                 obj.update_position(dt)
             
             # Update player
-            player_collision_result = self.player.update(self.platforms, self.camera, self.game_objects)
+            player_collision_result = self.player.update(self.platforms, self.camera, self.collision_objects, self.ground)
+            
+            # Gather every contact once - death, triggers and the flag all read this list
+            self.contacts = self.gather_contacts()
             
-            # Check spike collisions from all sides (additional check for game objects)
+            # Spike deaths come only from the contact list (swept and end-of-frame hits alike)
             spike_death = False
-            for obj in self.game_objects.values():
-                if hasattr(obj, 'spike') and obj.spike:
-                    is_visible = getattr(obj, 'visible', True) and getattr(obj, 'is_visible', True)
-                    if is_visible:
-                        spike_rect = pygame.Rect(obj.current_x, obj.current_y, obj.width, obj.height)
-                        if self.player.rect.colliderect(spike_rect):
-                            print(f"Player hit spike at {obj.current_x}, {obj.current_y}!")
-                            spike_death = True
-                            break
+            for contact_type, obj in self.contacts:
+                if contact_type == CONTACT_SPIKE:
+                    print(f"Player hit spike at {obj.current_x}, {obj.current_y}!")
+                    spike_death = True
+                    break
             
             # Handle player death from various causes
             player_died = False
@@ -1173,6 +2218,9 @@ class Game:
             elif player_collision_result == "pinch":
                 player_died = True
                 death_message = "Player was crushed by moving platforms!"
+            elif player_collision_result == "pit":
+                player_died = True
+                death_message = "Player fell into a pit!"
             elif player_collision_result:  # Any other truthy value (like True for falling)
                 player_died = True
                 death_message = "Player died from falling!"
@@ -1197,95 +2245,96 @@ class Game:
                     # Respawn player
                     print("Respawning player")
                     self.respawn_player()
+                
+                # Contacts belong to the level state before the death
+                self.contacts = []
             
-            # Check trigger boxes
-            for trigger in self.trigger_boxes:
-                # Only process enabled triggers
-                if not trigger.enabled:
+            # Fire touched trigger boxes
+            for contact_type, trigger in self.contacts:
+                if contact_type != CONTACT_TRIGGER:
                     continue
-                    
-                # Create trigger rect for collision detection
-                trigger_rect = pygame.Rect(trigger.current_x, trigger.current_y, trigger.width, trigger.height)
-                if self.player.rect.colliderect(trigger_rect) and not trigger.triggered:
+                
+                # An earlier trigger this frame may have disabled this one
+                if trigger.enabled and not trigger.triggered:
                     trigger.triggered = True
                     print(f"Trigger {trigger.obj_id} activated!")
-                    # Execute all trigger actions
-                    for obj_id_str, action_data in trigger.trigger_actions.items():
-                        # Handle both single action (old format) and multiple actions (new format)
-                        actions_list = []
-                        if isinstance(action_data, dict):
-                            actions_list = [action_data]  # Single action
-                        elif isinstance(action_data, list):
-                            actions_list = action_data  # Multiple actions
-                        
-                        for single_action in actions_list:
-                            action_type = single_action.get("action", "appear")
-                            delay = single_action.get("delay", 0.0)
-                            
-                            # Schedule action with delay if needed
-                            if delay > 0:
-                                self.schedule_delayed_action(single_action, obj_id_str, delay)
-                                continue
-                            
-                            # Execute immediately if no delay
-                            self.execute_trigger_action(single_action, obj_id_str)
+                    self.fire_trigger(trigger)
             
-            # Update camera
+            # Update camera and the chunks around it
             self.camera.update(self.player)
+            self.stream_chunks()
             
             # Check flag collision
-            if self.flag and self.player.rect.colliderect(self.flag.rect):
+            if any(contact_type == CONTACT_FLAG for contact_type, _ in self.contacts):
                 if not self.level_completed:
                     self.level_completed = True
                     print("Level completed! Press R to restart or ESC for menu.")
-    
-    def schedule_delayed_action(self, action_data, obj_id_str, delay):
-        """Schedule an action to be executed after a delay"""
-        execution_time = pygame.time.get_ticks() + int(delay * 1000)  # Convert seconds to milliseconds
-        self.delayed_actions.append((execution_time, action_data, obj_id_str))
-        print(f"Scheduled {action_data['action']} for object {obj_id_str} in {delay} seconds")
-    
-    def execute_trigger_action(self, action_data, obj_id_str):
-        """Execute a single trigger action immediately"""
-        action_type = action_data.get("action", "appear")
-        
-        # Handle trigger enable/disable actions
-        if action_type in ["enable", "disable"]:
-            target_trigger = None
-            for t in self.trigger_boxes:
-                if hasattr(t, 'obj_id') and str(t.obj_id) == str(obj_id_str):
-                    target_trigger = t
-                    break
             
-            if target_trigger:
-                if action_type == "enable":
-                    target_trigger.enabled = True
-                    target_trigger.triggered = False  # Reset triggered state when enabled
-                    print(f"Enabled trigger {obj_id_str}")
-                elif action_type == "disable":
-                    target_trigger.enabled = False
-                    print(f"Disabled trigger {obj_id_str}")
-            return
+            # A death reloads the level and starts a fresh history
+            if not player_died:
+                self.rewind_buffer.capture(self)
+    
+    def rewind_step(self):
+        """Step the game back one frame without reloading"""
+        if self.game_state == "playing" and not self.level_completed:
+            if self.rewind_buffer.rewind(self):
+                self.stream_chunks()
+    
+    def gather_contacts(self):
+        """Collect everything the player touches this frame in one pass, tagged by contact type"""
+        player_rect = self.player.rect
         
-        # Handle regular object actions
-        target_obj = None
-        for obj in self.game_objects.values():
-            if hasattr(obj, 'obj_id') and str(obj.obj_id) == str(obj_id_str):
-                target_obj = obj
-                break
+        # Spikes the player's moves ran into, then hazards touched where the player ended up
+        # (solid collisions are resolved by Player.update)
+        contacts = [(CONTACT_SPIKE, spike) for spike in self.player.spike_hits]
+        for obj in self.collision_objects.values():
+            if not obj.collision_layer & LAYER_HAZARD:
+                continue
+            if any(spike is obj for spike in self.player.spike_hits):
+                continue
+            if not (getattr(obj, 'visible', True) and getattr(obj, 'is_visible', True)):
+                continue
+            spike_rect = pygame.Rect(obj.current_x, obj.current_y, obj.width, obj.height)
+            if spike_pixels_hit(player_rect, self.player.mask, spike_rect, getattr(obj, 'tile_size', TILE_SIZE)):
+                contacts.append((CONTACT_SPIKE, obj))
         
-        if target_obj:
-            print(f"Executing {action_type} on object {obj_id_str}")
-            target_obj.trigger_action(
-                action_type,
-                target_x=action_data.get("target_x", target_obj.current_x),
-                target_y=action_data.get("target_y", target_obj.current_y),
-                duration=action_data.get("duration", 2.0)
-            )
-            
-
-        else:
-            print(f"Warning: Target object {obj_id_str} not found for action {action_type}")
+        # Enabled, not yet fired trigger boxes
+        for trigger in self.trigger_boxes:
+            if not trigger.enabled or trigger.triggered:
+                continue
+            trigger_rect = pygame.Rect(trigger.current_x, trigger.current_y, trigger.width, trigger.height)
+            if player_rect.colliderect(trigger_rect):
+                contacts.append((CONTACT_TRIGGER, trigger))
+        
+        # Level end flag
+        if self.flag and player_rect.colliderect(self.flag.rect):
+            contacts.append((CONTACT_FLAG, self.flag))
+        
+        return contacts
+    
+    def fire_trigger(self, trigger):
+        """Run a trigger's compiled actions and queue its delayed ones"""
+        for action in trigger.immediate_actions:
+            action.run()
+        
+        if trigger.delayed_actions:
+            current_time = self.game_clock.now()
+            for action in trigger.delayed_actions:
+                self.schedule_delayed_action(action, current_time)
+    
+    def cycle_turbo(self):
+        """Switch to the next fast-forward speed"""
+        index = TURBO_FACTORS.index(self.turbo_factor) if self.turbo_factor in TURBO_FACTORS else -1
+        self.turbo_factor = TURBO_FACTORS[(index + 1) % len(TURBO_FACTORS)]
+        print(f"Turbo: x{self.turbo_factor}")
+    
+    def schedule_delayed_action(self, action, current_time):
+        """Schedule a compiled action to be executed after its delay"""
+        execution_time = current_time + action.delay_ms
+        # Sequence number keeps firing order stable for equal times
+        heapq.heappush(self.delayed_actions, (execution_time, next(self.delayed_action_seq), action))
+        if self.debug_mode:
+            print(f"Scheduled {action.action_type} for object {action.target.obj_id} in {action.delay_ms / 1000} seconds")
     
     def draw(self):
         if self.game_state == "menu":
@@ -1312,32 +2361,34 @@ class Game:
                 screen_right = screen_left + obj.width
                 
                 if (screen_right > -TILE_SIZE and screen_left < SCREEN_WIDTH + TILE_SIZE):
-                    # Calculate tile positions
-                    tiles_x = obj.width // TILE_SIZE
-                    tiles_y = obj.height // TILE_SIZE
+                    # Calculate tile positions (spike strips carry their own tile size)
+                    tile_size = getattr(obj, 'tile_size', TILE_SIZE)
+                    tiles_x = obj.width // tile_size
+                    tiles_y = obj.height // tile_size
                     
                     for tile_y in range(tiles_y):
                         for tile_x in range(tiles_x):
-                            world_x = obj.current_x + (tile_x * TILE_SIZE)
-                            world_y = obj.current_y + (tile_y * TILE_SIZE)
+                            world_x = obj.current_x + (tile_x * tile_size)
+                            world_y = obj.current_y + (tile_y * tile_size)
                             
                             screen_x = world_x - self.camera.x
                             screen_y = world_y - self.camera.y
                             
                             # Only draw if tile is visible
-                            if (screen_x > -TILE_SIZE and screen_x < SCREEN_WIDTH and
-                                screen_y > -TILE_SIZE and screen_y < SCREEN_HEIGHT):
+                            if (screen_x > -tile_size and screen_x < SCREEN_WIDTH and
+                                screen_y > -tile_size and screen_y < SCREEN_HEIGHT):
                                 
                                 if hasattr(obj, 'spike') and obj.spike:
-                                    Tile.draw_spike_tile(screen, screen_x, screen_y)
+                                    Tile.draw_spike_tile(screen, screen_x, screen_y, tile_size)
                                 elif hasattr(obj, 'platform_type'):
                                     if obj.platform_type == "ground":
                                         Tile.draw_ground_tile(screen, screen_x, screen_y)
                                     elif obj.platform_type == "yellow_block":
                                         Tile.draw_yellow_tile(screen, screen_x, screen_y)
             
-            # Draw legacy platforms (for backwards compatibility)
-            for platform in self.platforms:
+            # Draw on-screen ground segments and legacy platforms (for backwards compatibility)
+            visible_ground = self.ground.segments_in_range(self.camera.x - TILE_SIZE, self.camera.x + SCREEN_WIDTH + TILE_SIZE)
+            for platform in visible_ground + self.platforms:
                 # Only draw if not already in game_objects AND is visible
                 if (platform not in self.game_objects.values() and 
                     getattr(platform, 'visible', True) and getattr(platform, 'is_visible', True)):
@@ -1386,12 +2437,14 @@ class Game:
             if self.flag:
                 flag_screen_rect = self.flag.rect.copy()
                 flag_screen_rect.x -= self.camera.x
+                flag_screen_rect.y -= self.camera.y
                 if -100 < flag_screen_rect.x < SCREEN_WIDTH + 100:
                     screen.blit(self.flag.image, flag_screen_rect)
             
             # Draw player with camera offset
             player_screen_rect = self.player.rect.copy()
             player_screen_rect.x -= self.camera.x
+            player_screen_rect.y -= self.camera.y
             screen.blit(self.player.image, player_screen_rect)
             
             # Debug mode visualizations
@@ -1399,13 +2452,15 @@ class Game:
                 # Draw player hitbox (Green)
                 debug_rect = self.player.rect.copy()
                 debug_rect.x -= self.camera.x
+                debug_rect.y -= self.camera.y
                 pygame.draw.rect(screen, (0, 255, 0), debug_rect, 3)
                 
                 # Draw platform hitboxes (Cyan for yellow blocks)
-                for platform in self.platforms:
+                for platform in self.ground.segments + self.platforms:
                     if hasattr(platform, 'rect'):
                         platform_rect = platform.rect.copy()
                         platform_rect.x -= self.camera.x
+                        platform_rect.y -= self.camera.y
                         pygame.draw.rect(screen, (0, 255, 255), platform_rect, 2)
                 
                 # Draw game object hitboxes
@@ -1423,6 +2478,24 @@ class Game:
                 
 
                 
+                # Frame time and collider count
+                stats_text = pygame.font.Font(None, 24).render(
+                    f"Frame: {clock.get_rawtime()} ms | Colliders: {len(self.collision_objects)} | "
+                    f"Sim time: {self.game_clock.now() / 1000:.1f} s", True, WHITE)
+                screen.blit(stats_text, (10, 10))
+                
+                # Rewind history size and capture cost
+                rewind_text = pygame.font.Font(None, 24).render(
+                    f"Rewind: {len(self.rewind_buffer.frames)} frames | "
+                    f"{self.rewind_buffer.memory_bytes() / 1024:.0f} KB | "
+                    f"{self.rewind_buffer.capture_ms:.3f} ms/frame", True, WHITE)
+                screen.blit(rewind_text, (10, 30))
+                
+                # Background tasks still queued
+                tasks_text = pygame.font.Font(None, 24).render(
+                    f"Tasks: {len(self.task_scheduler.tasks)}", True, WHITE)
+                screen.blit(tasks_text, (10, 50))
+                
                 # Draw trigger boxes (Orange translucent with TRIGGER text like editor)
                 for trigger in self.trigger_boxes:
                     trigger_screen_x = trigger.current_x - self.camera.x
@@ -1455,6 +2528,13 @@ class Game:
                 text_rect = safe_text.get_rect(center=(SCREEN_WIDTH // 2, 30))
                 screen.blit(safe_text, text_rect)
             
+            # Draw turbo indicator
+            if self.turbo_factor > 1:
+                font = pygame.font.Font(None, 36)
+                turbo_text = font.render(f"TURBO x{self.turbo_factor}", True, (255, 200, 0))
+                text_rect = turbo_text.get_rect(center=(SCREEN_WIDTH // 2, 60))
+                screen.blit(turbo_text, text_rect)
+            
             # Draw UI
             if self.level_completed:
                 font = pygame.font.Font(None, 36)
@@ -1462,56 +2542,71 @@ class Game:
                 text_rect = text.get_rect(center=(SCREEN_WIDTH//2, 50))
                 screen.blit(text, text_rect)
 
-# Create game instance
-game = Game()
-
-# Start background music
-load_background_music()
-
-# Game loop
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if game.game_state == "menu":
-                # Handle menu input
-                selected_level = game.menu.handle_input(event)
-                if selected_level:
-                    game.start_level(selected_level)
-            elif game.game_state == "playing":
-                # Handle game input
-                keys = pygame.key.get_pressed()
-                if event.key == pygame.K_r:
-                    game.level_completed = False
-                    game.load_map(game.current_map)
-                elif event.key == pygame.K_ESCAPE:
-                    game.return_to_menu()
-                elif event.key == pygame.K_o and keys[pygame.K_LCTRL] and keys[pygame.K_LALT]:
-                    game.debug_mode = not game.debug_mode
-                    print(f"Debug mode: {'ON' if game.debug_mode else 'OFF'}")
-                elif event.key == pygame.K_s and keys[pygame.K_LCTRL] and keys[pygame.K_LALT]:
-                    # Safe mode password prompt
-                    if prompt_password():
-                        activate_safe_mode()
-                    else:
-                        print("Incorrect password")
-                elif event.key == pygame.K_1:
-                    game.start_level("level1")
-                elif event.key == pygame.K_2:
-                    game.start_level("level2")
-                elif event.key == pygame.K_3:
-                    game.start_level("level3")
-    
-    # Update
-    game.update()
-    
-    # Draw
-    game.draw()
-    
-    pygame.display.flip()
-    clock.tick(FPS)
-
-pygame.quit()
-sys.exit()
\ No newline at end of file
+if __name__ == "__main__":
+    # Create game instance
+    game = Game()
+
+    # Start background music
+    load_background_music()
+
+    # Game loop
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if game.game_state == "menu":
+                    # Handle menu input
+                    selected_level = game.menu.handle_input(event)
+                    if selected_level:
+                        game.start_level(selected_level)
+                elif game.game_state == "playing":
+                    # Handle game input
+                    keys = pygame.key.get_pressed()
+                    if event.key == pygame.K_r:
+                        game.level_completed = False
+                        game.load_map(game.current_map)
+                    elif event.key == pygame.K_ESCAPE:
+                        game.return_to_menu()
+                    elif event.key == pygame.K_o and keys[pygame.K_LCTRL] and keys[pygame.K_LALT]:
+                        game.debug_mode = not game.debug_mode
+                        print(f"Debug mode: {'ON' if game.debug_mode else 'OFF'}")
+                    elif event.key == pygame.K_t and keys[pygame.K_LCTRL] and keys[pygame.K_LALT]:
+                        game.cycle_turbo()
+                    elif event.key == pygame.K_s and keys[pygame.K_LCTRL] and keys[pygame.K_LALT]:
+                        # Safe mode password prompt
+                        if prompt_password():
+                            activate_safe_mode()
+                        else:
+                            print("Incorrect password")
+                    elif event.key == pygame.K_1:
+                        game.start_level("level1")
+                    elif event.key == pygame.K_2:
+                        game.start_level("level2")
+                    elif event.key == pygame.K_3:
+                        game.start_level("level3")
+    
+        # Prepare the highlighted level in the background while the menu is idle
+        if game.game_state == "menu":
+            game.prefetch_selected_level()
+    
+        # Update (turbo runs several simulation steps per rendered frame)
+        rewinding = game.game_state == "playing" and pygame.key.get_pressed()[pygame.K_BACKSPACE]
+        for _ in range(game.turbo_factor):
+            if rewinding:
+                game.rewind_step()
+            else:
+                game.update()
+    
+        # Draw
+        game.draw()
+    
+        # Spend what is left of the frame budget on background tasks
+        game.task_scheduler.run_slice()
+    
+        pygame.display.flip()
+        clock.tick(FPS)
+
+    pygame.quit()
+    sys.exit()
\ No newline at end of file
@@ -2,9 +2,14 @@ import pygame
 import json
 import os
 import sys
+import copy
+import itertools
+import math
+import threading
+import time
+from collections import deque
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-import tkinter as tk
 
 # Helper function for resource paths (PyInstaller compatibility)
 def resource_path(relative_path):
@@ -37,6 +42,19 @@ FPS = 60
 GRID_SIZE = 20
 CAMERA_SPEED = 10
 
+# Redraw only when something changed; while idle, sleep in pygame.event.wait for up to IDLE_WAIT_MS
+REDRAW_ON_DEMAND = True
+IDLE_WAIT_MS = 250
+
+# Unsaved edits are written to "<level>.json.autosave" in the background this often
+AUTOSAVE_INTERVAL_MS = 60 * 1000
+# How long the "Saved ..." message stays in the UI bar
+SAVE_STATUS_MS = 4000
+
+# Every edit is appended to a journal next to the map; it is fsynced at most this often
+JOURNAL_FSYNC_MS = 1000
+JOURNAL_VERSION = 1
+
 # Game camera constants (from the actual game)
 GAME_SCREEN_WIDTH = 800
 GAME_SCREEN_HEIGHT = 600
@@ -62,11 +80,124 @@ screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Dani's Platformer Level Editor")
 clock = pygame.time.Clock()
 
+# Undo history is unbounded apart from this rough memory budget (bytes)
+UNDO_MEMORY_LIMIT = 32 * 1024 * 1024
+
+# Marks a dict key that did not exist before a modify operation
+MISSING = object()
+
 # UI Constants
 UI_HEIGHT = 100
 GAME_HEIGHT = SCREEN_HEIGHT - UI_HEIGHT
 GROUND_Y = 560  # Default ground level
 
+# Placed objects are bucketed into square cells of this size for hit-testing and culling
+SPATIAL_CELL_SIZE = GRID_SIZE * 10
+
+# Object lists covered by the spatial index
+INDEXED_LISTS = ("yellow_blocks", "pits", "spikes", "trigger_boxes", "text_elements")
+
+# Object lists whose objects can be looked up by ID (trigger actions target them by ID)
+ID_INDEXED_LISTS = ("yellow_blocks", "spikes", "trigger_boxes", "text_elements")
+
+# Object lists whose grid cells are tracked in the occupancy hash, for O(1) duplicate checks
+OCCUPANCY_LAYERS = ("spikes", "text_elements")
+
+# Object fields the indexes above are keyed by
+INDEXED_KEYS = ("x", "y", "width", "height", "id")
+
+# Pre-rendered object sprites and labels; both caches are cleared once they grow past these sizes
+SPRITE_CACHE_LIMIT = 512
+LABEL_CACHE_LIMIT = 2048
+# Bigger objects are drawn directly instead of being cached as one surface
+SPRITE_MAX_PIXELS = 1024 * 1024
+
+class SpatialIndex:
+    """Grid buckets over placed objects, so point and rectangle queries only visit nearby cells"""
+    
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (list name, cell x, cell y) -> {id(obj): obj}
+        self.entries = {}  # id(obj) -> (cell keys, insertion order)
+        self.order = itertools.count()
+    
+    def cell_keys(self, list_name, left, top, right, bottom):
+        """Keys of every cell the rectangle [left, right) x [top, bottom) touches"""
+        size = self.cell_size
+        right = max(right - 1, left)
+        bottom = max(bottom - 1, top)
+        return [(list_name, cx, cy)
+                for cx in range(int(left) // size, int(right) // size + 1)
+                for cy in range(int(top) // size, int(bottom) // size + 1)]
+    
+    def insert(self, list_name, obj, bounds):
+        keys = self.cell_keys(list_name, *bounds)
+        for key in keys:
+            self.cells.setdefault(key, {})[id(obj)] = obj
+        self.entries[id(obj)] = (keys, next(self.order))
+    
+    def remove(self, obj):
+        entry = self.entries.pop(id(obj), None)
+        if entry is None:
+            return
+        for key in entry[0]:
+            bucket = self.cells[key]
+            del bucket[id(obj)]
+            if not bucket:
+                del self.cells[key]
+    
+    def query(self, list_name, left, top, right, bottom):
+        """Objects of one list whose cells the rectangle touches, in the order they were added.
+        Candidates only: callers still test the exact shape."""
+        found = {}
+        for key in self.cell_keys(list_name, left, top, right, bottom):
+            bucket = self.cells.get(key)
+            if bucket:
+                found.update(bucket)
+        if len(found) < 2:
+            return list(found.values())
+        entries = self.entries
+        return sorted(found.values(), key=lambda obj: entries[id(obj)][1])
+    
+    def query_point(self, list_name, x, y):
+        return self.query(list_name, x, y, x + 1, y + 1)
+    
+    def list_name_of(self, obj):
+        """Name of the list an indexed object belongs to, or None"""
+        entry = self.entries.get(id(obj))
+        return entry[0][0][0] if entry else None
+
+class DialogService:
+    """One hidden Tk root, created on first use and shared by every editor dialog"""
+    
+    def __init__(self):
+        self._root = None
+    
+    def root(self):
+        """The shared hidden root (recreated if something destroyed it)"""
+        if self._root is None or not self._root.winfo_exists():
+            self._root = tk.Tk()
+            self._root.withdraw()
+        return self._root
+    
+    def ask_string(self, title, prompt, **kwargs):
+        return simpledialog.askstring(title, prompt, parent=self.root(), **kwargs)
+    
+    def show_warning(self, title, message):
+        messagebox.showwarning(title, message, parent=self.root())
+    
+    def window(self, title, geometry):
+        """New centered dialog window on top of the shared root"""
+        window = tk.Toplevel(self.root())
+        window.title(title)
+        window.geometry(geometry)
+        window.eval(f'tk::PlaceWindow {window} center')
+        return window
+    
+    def run(self, window):
+        """Process Tk events until the dialog window is destroyed"""
+        window.wait_window()
+
 class LevelEditor:
     def __init__(self):
         self.camera_x = 0
@@ -86,9 +217,13 @@ class LevelEditor:
         self.action_mode = False  # When true, clicking objects sets trigger actions
         self.action_step = 0  # 0: select trigger, 1: select object, 2: select action
         self.move_duration = 2.0
+        self.move_mode = "once"  # Move track mode: once, loop or ping_pong
         self.temp_move_position = None  # Temporary storage for move position before applying
-        self.ghost_objects = []  # Store ghost positions for move actions
-        self.connection_lines = []  # Store trigger-object connections
+        # Visual indicators derived from trigger actions, keyed by trigger ID and refreshed
+        # per trigger when its actions change; records refer to objects by ID
+        self.ghost_objects = {}  # Trigger ID -> ghost positions for move actions
+        self.connection_lines = {}  # Trigger ID -> trigger-object connections
+        self.objects_by_id = {}  # str(ID) -> object
         self.ghost_cursor_object = None  # Object being positioned for move action
         self.mouse_world_pos = (0, 0)  # Current mouse position in world coordinates
         self.dragging = False
@@ -97,15 +232,55 @@ class LevelEditor:
         self.font = pygame.font.Font(None, 24)
         self.small_font = pygame.font.Font(None, 18)
         
-        # Undo/Redo functionality
-        self.undo_history = []
+        # Undo/Redo: each entry is [ops, estimated bytes]; an edit is undone by applying the inverse ops
+        self.undo_history = deque()
         self.redo_history = []
-        self.max_undo_history = 50  # Limit to prevent memory issues
+        self.current_edit = None  # Ops list of the open edit, closed by the next begin_edit()
+        self.undo_memory = 0  # Estimated bytes held by undo_history
+        
+        # Spatial index over placed objects, kept in sync by _insert/_delete
+        self.spatial_index = SpatialIndex()
+        # (cell x, cell y, layer) -> number of objects of that layer covering the grid cell
+        self.occupied_cells = {}
+        
+        # Pre-rendered surfaces keyed by everything that affects their look, so an
+        # object that changes (size, enabled, selected, ID) simply maps to a new entry
+        self.sprite_cache = {}  # (kind, width, height, state) -> Surface
+        self.label_cache = {}  # (text, color, small) -> Surface
+        
+        # Static layers are rendered once and only blitted each frame
+        self.sky_surface = self.render_sky_surface()
+        self.grid_surface = self.render_grid_surface()
+        
+        # Set whenever the picture may have changed; run() only redraws while it is set
+        self.needs_redraw = True
+        
+        # Tk dialogs share one lazily created hidden root
+        self.dialogs = DialogService()
+        
+        # Background saving: edit_count goes up with every change; saved_edit_count and
+        # autosaved_edit_count are the counts the last finished save (or load) and autosave captured
+        self.edit_count = 0
+        self.saved_edit_count = 0
+        self.saved_level_name = self.level_name  # Level whose file saved_edit_count refers to
+        self.autosaved_edit_count = 0
+        self.save_thread = None
+        self.save_status = None  # Progress of the current or last save, shown in draw_ui
+        self.last_save_ticks = 0
+        
+        # Append-only edit journal (crash recovery): the last save plus these records is the session
+        self.journal_file = None
+        self.journal_path = None
+        self.journal_unsynced = False
+        self.journal_synced_ticks = 0
         
         # Ensure maps directory exists (use executable directory)
         self.maps_dir = executable_dir_path("maps")
         if not os.path.exists(self.maps_dir):
             os.makedirs(self.maps_dir)
+        
+        # The editor starts on an empty, never saved level
+        self.open_journal(has_base=False)
     
     def screen_to_world(self, screen_x, screen_y):
         """Convert screen coordinates to world coordinates"""
@@ -131,7 +306,7 @@ class LevelEditor:
         if mouse_y < GAME_HEIGHT:
             self.mouse_world_pos = self.screen_to_world(mouse_x, mouse_y)
         
-        # Camera movement
+        # Camera movement (keep these keys in sync with camera_keys_held)
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
             self.camera_x -= CAMERA_SPEED
         if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
@@ -238,25 +413,20 @@ class LevelEditor:
     def place_object(self, world_x, world_y):
         snapped_x, snapped_y = self.snap_to_grid(world_x, world_y)
         
-        # Save state before making changes
-        if self.current_tool in ["flag", "start", "spike", "erase"]:
-            self.save_state_to_undo()
+        # Start a new undo step
+        self.begin_edit()
         
         if self.current_tool == "flag":
-            self.flag_x = snapped_x
+            self.set_flag(snapped_x)
         elif self.current_tool == "start":
-            self.start_x = snapped_x
+            self.set_start(snapped_x)
         elif self.current_tool == "spike":
-            # Check if spike already exists at this position
-            spike_exists = False
-            for existing_spike in self.spikes:
-                if existing_spike["x"] == snapped_x and existing_spike["y"] == snapped_y:
-                    spike_exists = True
-                    break
+            # Check if a spike (or spike strip) already covers this position
+            spike_exists = self.cell_occupied(snapped_x, snapped_y, "spikes")
             
             # Only add spike if none exists at this position
             if not spike_exists:
-                self.spikes.append({
+                self.add_object("spikes", {
                     "x": snapped_x,
                     "y": snapped_y,
                     "width": GRID_SIZE,
@@ -266,22 +436,15 @@ class LevelEditor:
                 self.next_object_id += 1
         elif self.current_tool == "text":
             # Prompt for text content
-            root = tk.Tk()
-            root.withdraw()
-            text_content = simpledialog.askstring("Text Element", "Enter text content:")
-            root.destroy()
+            text_content = self.dialogs.ask_string("Text Element", "Enter text content:")
             
             if text_content:
                 # Check if text already exists at this position
-                text_exists = False
-                for existing_text in self.text_elements:
-                    if existing_text["x"] == snapped_x and existing_text["y"] == snapped_y:
-                        text_exists = True
-                        break
+                text_exists = self.cell_occupied(snapped_x, snapped_y, "text_elements")
                 
                 # Only add text if none exists at this position
                 if not text_exists:
-                    self.text_elements.append({
+                    self.add_object("text_elements", {
                         "x": snapped_x,
                         "y": snapped_y,
                         "width": len(text_content) * 12,  # Approximate width based on text length
@@ -300,8 +463,8 @@ class LevelEditor:
         if not start_pos:
             return
         
-        # Save state before making changes
-        self.save_state_to_undo()
+        # Start a new undo step
+        self.begin_edit()
         
         x1, y1 = start_pos
         x2, y2 = end_pos
@@ -317,10 +480,9 @@ class LevelEditor:
         
         if self.current_tool == "yellow_block":
             # Remove any overlapping blocks first
-            self.yellow_blocks = [block for block in self.yellow_blocks 
-                                if not self.rectangles_overlap(block, {"x": left, "y": top, "width": width, "height": height})]
+            self.remove_objects("yellow_blocks", self.objects_in_rect("yellow_blocks", left, top, left + width, top + height))
             
-            self.yellow_blocks.append({
+            self.add_object("yellow_blocks", {
                 "x": left,
                 "y": top,
                 "width": width,
@@ -334,49 +496,60 @@ class LevelEditor:
             pit_width = width
             
             # Remove overlapping pits
-            self.pits = [pit for pit in self.pits 
-                        if not (pit["x"] < left + pit_width and pit["x"] + pit["width"] > left)]
+            self.remove_objects("pits", self.objects_in_rect("pits", left, GROUND_Y, left + pit_width, GROUND_Y + 1))
             
-            self.pits.append({
+            self.add_object("pits", {
                 "x": left,
                 "width": pit_width
             })
         
         elif self.current_tool == "spike":
-            # Create multiple spikes in rectangle, avoiding duplicates
-            for x in range(left, right + GRID_SIZE, GRID_SIZE):
-                for y in range(top, bottom + GRID_SIZE, GRID_SIZE):
-                    # Check if spike already exists at this position
-                    spike_exists = False
-                    for existing_spike in self.spikes:
-                        if existing_spike["x"] == x and existing_spike["y"] == y:
-                            spike_exists = True
-                            break
-                    
-                    # Only add spike if none exists at this position
-                    if not spike_exists:
-                        self.spikes.append({
-                            "x": x,
-                            "y": y,
-                            "width": GRID_SIZE,
-                            "height": GRID_SIZE,
-                            "id": self.next_object_id
-                        })
-                        self.next_object_id += 1
+            if width == GRID_SIZE and height == GRID_SIZE:
+                # Single cell - plain spike, avoiding duplicates
+                spike_exists = self.cell_occupied(left, top, "spikes")
+                if not spike_exists:
+                    self.add_object("spikes", {
+                        "x": left,
+                        "y": top,
+                        "width": GRID_SIZE,
+                        "height": GRID_SIZE,
+                        "id": self.next_object_id
+                    })
+                    self.next_object_id += 1
+            else:
+                # Fill the rectangle with spike strips instead of one spike per cell.
+                # Spikes and strips inside it are absorbed unless a trigger still points at them;
+                # cells of the ones that stay (targeted, or reaching outside) are left to them.
+                targeted_ids = self.get_trigger_target_ids()
+                self.remove_objects("spikes", [
+                    spike for spike in self.objects_in_rect("spikes", left, top, left + width, top + height)
+                    if str(spike.get("id")) not in targeted_ids and
+                    left <= spike["x"] and spike["x"] + spike["width"] <= left + width and
+                    top <= spike["y"] and spike["y"] + spike["height"] <= top + height])
+                
+                for strip_x, strip_y, strip_width, strip_height in self.free_spike_rects(left, top, width, height):
+                    spike = {
+                        "x": strip_x,
+                        "y": strip_y,
+                        "width": strip_width,
+                        "height": strip_height,
+                        "id": self.next_object_id
+                    }
+                    if strip_width > GRID_SIZE or strip_height > GRID_SIZE:
+                        spike["tile_size"] = GRID_SIZE
+                    self.add_object("spikes", spike)
+                    self.next_object_id += 1
         
         elif self.current_tool == "text":
             # Prompt for text content
-            root = tk.Tk()
-            root.withdraw()
-            text_content = simpledialog.askstring("Text Element", "Enter text content:")
-            root.destroy()
+            text_content = self.dialogs.ask_string("Text Element", "Enter text content:")
             
             if text_content:
                 # Create single text element at rectangle center
                 center_x = left + width // 2
                 center_y = top + height // 2
                 
-                self.text_elements.append({
+                self.add_object("text_elements", {
                     "x": center_x,
                     "y": center_y,
                     "width": len(text_content) * 12,
@@ -388,7 +561,7 @@ class LevelEditor:
         
         elif self.current_tool == "trigger_box":
             # Create trigger box
-            self.trigger_boxes.append({
+            self.add_object("trigger_boxes", {
                 "x": left,
                 "y": top,
                 "width": width,
@@ -399,111 +572,92 @@ class LevelEditor:
             })
             self.next_object_id += 1
     
+    def free_spike_rects(self, left, top, width, height):
+        """Cover the cells of a rectangle that no spike occupies with as few rectangles as possible.
+        Runs of free cells in each row are stacked with identical runs in the rows below."""
+        rects = []
+        open_rects = {}  # (x, width) -> rectangle still growing downwards
+        for y in range(top, top + height, GRID_SIZE):
+            runs = []
+            run_start = None
+            for x in range(left, left + width + GRID_SIZE, GRID_SIZE):
+                free = x < left + width and not self.cell_occupied(x, y, "spikes")
+                if free and run_start is None:
+                    run_start = x
+                elif not free and run_start is not None:
+                    runs.append((run_start, x - run_start))
+                    run_start = None
+            
+            grown = {}
+            for run in runs:
+                rect = open_rects.pop(run, None)
+                if rect is None:
+                    rect = [run[0], y, run[1], 0]
+                    rects.append(rect)
+                rect[3] += GRID_SIZE
+                grown[run] = rect
+            open_rects = grown
+        return [tuple(rect) for rect in rects]
+    
+    def get_trigger_target_ids(self):
+        """Return the IDs (as strings) of every object some trigger action points at"""
+        return {str(target_id) for trigger in self.trigger_boxes for target_id in trigger.get("actions", {})}
+    
     def rectangles_overlap(self, rect1, rect2):
-        """Check if two rectangles overlap"""
-        return not (rect1["x"] + rect1["width"] <= rect2["x"] or
-                   rect2["x"] + rect2["width"] <= rect1["x"] or
-                   rect1["y"] + rect1["height"] <= rect2["y"] or
-                   rect2["y"] + rect2["height"] <= rect1["y"])
+        """Check if two (left, top, right, bottom) rectangles overlap"""
+        return not (rect1[2] <= rect2[0] or
+                   rect2[2] <= rect1[0] or
+                   rect1[3] <= rect2[1] or
+                   rect2[3] <= rect1[1])
     
     def erase_at_position(self, x, y):
         """Remove objects at the given position"""
-        erased_objects = []
-        
-        # Remove yellow blocks and track erased ones
-        original_blocks = self.yellow_blocks.copy()
-        self.yellow_blocks = [block for block in self.yellow_blocks 
-                            if not (block["x"] <= x < block["x"] + block["width"] and
-                                   block["y"] <= y < block["y"] + block["height"])]
-        erased_objects.extend([block for block in original_blocks if block not in self.yellow_blocks])
-        
-        # Remove pits
-        self.pits = [pit for pit in self.pits 
-                    if not (pit["x"] <= x < pit["x"] + pit["width"])]
-        
-        # Remove spikes and track erased ones
-        original_spikes = self.spikes.copy()
-        self.spikes = [spike for spike in self.spikes 
-                      if not (spike["x"] <= x < spike["x"] + spike["width"] and
-                             spike["y"] <= y < spike["y"] + spike["height"])]
-        erased_objects.extend([spike for spike in original_spikes if spike not in self.spikes])
-        
-        # Remove text elements and track erased ones
-        original_texts = self.text_elements.copy()
-        self.text_elements = [text for text in self.text_elements 
-                             if not (text["x"] <= x < text["x"] + text["width"] and
-                                    text["y"] <= y < text["y"] + text["height"])]
-        erased_texts = [text for text in original_texts if text not in self.text_elements]
-        
-        # Remove trigger boxes and track erased ones
-        original_triggers = self.trigger_boxes.copy()
-        self.trigger_boxes = [trigger for trigger in self.trigger_boxes 
-                            if not (trigger["x"] <= x < trigger["x"] + trigger["width"] and
-                                   trigger["y"] <= y < trigger["y"] + trigger["height"])]
-        erased_triggers = [trigger for trigger in original_triggers if trigger not in self.trigger_boxes]
-        
-        # Clean up connection lines for erased objects
-        for erased_obj in erased_objects + erased_triggers + erased_texts:
-            # Remove connections where this object is the target
-            self.connection_lines = [conn for conn in self.connection_lines 
-                                   if conn["object"] != erased_obj]
-            # Remove connections where this object is the trigger
-            self.connection_lines = [conn for conn in self.connection_lines 
-                                   if conn["trigger"] != erased_obj]
-            
-            # Remove ghost objects for this object
-            self.ghost_objects = [ghost for ghost in self.ghost_objects 
-                                if ghost.get("original") != erased_obj]
+        # Indicators of erased triggers go with them; lines to erased targets are skipped when drawing
+        for list_name in ("yellow_blocks", "spikes", "text_elements", "trigger_boxes"):
+            self.remove_objects(list_name, self.objects_at_point(list_name, x, y))
+        
+        # Remove pits (they cover the whole column above the ground)
+        self.remove_objects("pits", self.objects_at_point("pits", x, GROUND_Y))
     
     def handle_action_mode_click(self, world_x, world_y):
         """Handle clicks in action mode for setting up trigger actions"""
         if self.action_step == 0:  # Select trigger
-            for trigger in self.trigger_boxes:
-                if (trigger["x"] <= world_x < trigger["x"] + trigger["width"] and
-                    trigger["y"] <= world_y < trigger["y"] + trigger["height"]):
-                    self.selected_trigger = trigger
-                    self.action_step = 1
-                    print(f"Trigger {trigger['id']} selected. Now click on an object to link.")
-                    return
+            for trigger in self.objects_at_point("trigger_boxes", world_x, world_y):
+                self.selected_trigger = trigger
+                self.action_step = 1
+                print(f"Trigger {trigger['id']} selected. Now click on an object to link.")
+                return
             print("Click on a trigger box to select it.")
         
         elif self.action_step == 1:  # Select object
             # Check yellow blocks
-            for block in self.yellow_blocks:
-                if (block["x"] <= world_x < block["x"] + block["width"] and
-                    block["y"] <= world_y < block["y"] + block["height"]):
-                    self.selected_object = block
-                    self.show_action_dialog()
-                    return
+            for block in self.objects_at_point("yellow_blocks", world_x, world_y):
+                self.selected_object = block
+                self.show_action_dialog()
+                return
             
             # Check spikes
-            for spike in self.spikes:
-                if (spike["x"] <= world_x < spike["x"] + spike["width"] and
-                    spike["y"] <= world_y < spike["y"] + spike["height"]):
-                    self.selected_object = spike
-                    self.show_action_dialog()
-                    return
+            for spike in self.objects_at_point("spikes", world_x, world_y):
+                self.selected_object = spike
+                self.show_action_dialog()
+                return
             
             # Check text elements
-            for text in self.text_elements:
-                if (text["x"] <= world_x < text["x"] + text["width"] and
-                    text["y"] <= world_y < text["y"] + text["height"]):
-                    self.selected_object = text
-                    self.selected_object["type"] = "text"
-                    self.show_action_dialog()
-                    return
+            for text in self.objects_at_point("text_elements", world_x, world_y):
+                self.selected_object = text
+                self.selected_object["type"] = "text"
+                self.show_action_dialog()
+                return
             
             # Check other triggers (for enable/disable actions)
-            for trigger in self.trigger_boxes:
-                if (trigger["x"] <= world_x < trigger["x"] + trigger["width"] and
-                    trigger["y"] <= world_y < trigger["y"] + trigger["height"]):
-                    # Don't allow self-targeting
-                    if trigger != self.selected_trigger:
-                        trigger_copy = trigger.copy()
-                        trigger_copy["type"] = "trigger"  # Mark as trigger for action selection
-                        self.selected_object = trigger_copy
-                        self.show_action_dialog()
-                        return
+            for trigger in self.objects_at_point("trigger_boxes", world_x, world_y):
+                # Don't allow self-targeting
+                if trigger != self.selected_trigger:
+                    trigger_copy = trigger.copy()
+                    trigger_copy["type"] = "trigger"  # Mark as trigger for action selection
+                    self.selected_object = trigger_copy
+                    self.show_action_dialog()
+                    return
             
             print("Click on an object (yellow block, spike, or another trigger) to link it to the trigger.")
     
@@ -589,12 +743,7 @@ class LevelEditor:
     
     def show_trigger_action_dialog(self):
         """Show dialog for trigger-to-trigger actions"""
-        root = tk.Tk()
-        root.title("Trigger Action Setup")
-        root.geometry("400x200")
-        
-        # Center the window
-        root.eval('tk::PlaceWindow . center')
+        root = self.dialogs.window("Trigger Action Setup", "400x200")
         
         # Variables for checkboxes
         enable_var = tk.BooleanVar()
@@ -640,67 +789,60 @@ class LevelEditor:
         button_frame.pack(pady=20)
         
         def apply_action():
-            # Save state before making changes
-            self.save_state_to_undo()
-            
-            # Get current actions to modify
-            if "actions" not in self.selected_trigger:
-                self.selected_trigger["actions"] = {}
-            
-            obj_id = str(self.selected_object["id"])
-            
-            # Initialize actions list if needed
-            if obj_id not in self.selected_trigger["actions"]:
-                self.selected_trigger["actions"][obj_id] = []
-            elif isinstance(self.selected_trigger["actions"][obj_id], dict):
-                # Convert old single action format to list
-                old_action = self.selected_trigger["actions"][obj_id]
-                self.selected_trigger["actions"][obj_id] = [old_action]
-            
-            current_actions = self.selected_trigger["actions"][obj_id]
+            # Start a new undo step; the trigger's actions are recorded as one modify
+            self.begin_edit()
+            trigger = self.selected_trigger
+            old_actions = self.snapshot_key(trigger, "actions")
             
-            # Remove existing enable/disable actions
-            current_actions[:] = [action for action in current_actions 
-                                if action["action"] not in ["enable", "disable"]]
-            
-            # Add the new action if selected
-            if enable_var.get():
-                action_data = {
-                    "action": "enable",
-                    "duration": 0.0,
-                    "delay": 0.0
-                }
-                current_actions.append(action_data)
-                print(f"Added enable action: Trigger {self.selected_trigger['id']} -> Trigger {self.selected_object['id']}")
-                # Add visual indicator
-                self.connection_lines.append({
-                    "trigger": self.selected_trigger,
-                    "object": self.selected_object,
-                    "action": "enable"
-                })
-            elif disable_var.get():
-                action_data = {
-                    "action": "disable", 
-                    "duration": 0.0,
-                    "delay": 0.0
-                }
-                current_actions.append(action_data)
-                print(f"Added disable action: Trigger {self.selected_trigger['id']} -> Trigger {self.selected_object['id']}")
-                # Add visual indicator
-                self.connection_lines.append({
-                    "trigger": self.selected_trigger,
-                    "object": self.selected_object,
-                    "action": "disable"
-                })
-            
-            # Clean up empty actions (this handles the case where nothing is selected)
-            if not current_actions:
-                del self.selected_trigger["actions"][obj_id]
-                if not self.selected_trigger["actions"]:
-                    del self.selected_trigger["actions"]
-            
-            root.destroy()
-            self.reset_action_mode()
+            try:
+                # Get current actions to modify
+                if "actions" not in self.selected_trigger:
+                    self.selected_trigger["actions"] = {}
+                
+                obj_id = str(self.selected_object["id"])
+                
+                # Initialize actions list if needed
+                if obj_id not in self.selected_trigger["actions"]:
+                    self.selected_trigger["actions"][obj_id] = []
+                elif isinstance(self.selected_trigger["actions"][obj_id], dict):
+                    # Convert old single action format to list
+                    old_action = self.selected_trigger["actions"][obj_id]
+                    self.selected_trigger["actions"][obj_id] = [old_action]
+                
+                current_actions = self.selected_trigger["actions"][obj_id]
+                
+                # Remove existing enable/disable actions
+                current_actions[:] = [action for action in current_actions 
+                                    if action["action"] not in ["enable", "disable"]]
+                
+                # Add the new action if selected
+                if enable_var.get():
+                    action_data = {
+                        "action": "enable",
+                        "duration": 0.0,
+                        "delay": 0.0
+                    }
+                    current_actions.append(action_data)
+                    print(f"Added enable action: Trigger {self.selected_trigger['id']} -> Trigger {self.selected_object['id']}")
+                elif disable_var.get():
+                    action_data = {
+                        "action": "disable", 
+                        "duration": 0.0,
+                        "delay": 0.0
+                    }
+                    current_actions.append(action_data)
+                    print(f"Added disable action: Trigger {self.selected_trigger['id']} -> Trigger {self.selected_object['id']}")
+                
+                # Clean up empty actions (this handles the case where nothing is selected)
+                if not current_actions:
+                    del self.selected_trigger["actions"][obj_id]
+                    if not self.selected_trigger["actions"]:
+                        del self.selected_trigger["actions"]
+                
+                root.destroy()
+                self.reset_action_mode()
+            finally:
+                self.record_modify(trigger, "actions", old_actions)
         
         def cancel_action():
             root.destroy()
@@ -712,16 +854,11 @@ class LevelEditor:
         cancel_btn = tk.Button(button_frame, text="Cancel", command=cancel_action, bg='lightcoral')
         cancel_btn.pack(side='left', padx=10)
         
-        root.mainloop()
+        self.dialogs.run(root)
     
     def show_object_action_dialog(self):
         """Show dialog for trigger-to-object actions"""
-        root = tk.Tk()
-        root.title("Object Action Setup")
-        root.geometry("450x300")
-        
-        # Center the window
-        root.eval('tk::PlaceWindow . center')
+        root = self.dialogs.window("Object Action Setup", "450x340")
         
         # Variables for checkboxes and entries
         appear_var = tk.BooleanVar()
@@ -738,6 +875,11 @@ class LevelEditor:
         disappear_delay_var = tk.StringVar(value="0.0")
         move_delay_var = tk.StringVar(value="0.0")
         
+        # A fresh dialog starts in "once" mode unless the object already has a move;
+        # when reopened after placing a move target, the mode chosen before is kept
+        if not self.temp_move_position:
+            self.move_mode = "once"
+        
         # Check existing actions and pre-select checkboxes
         existing_actions = self.get_all_existing_actions()
         for action_data in existing_actions:
@@ -753,6 +895,8 @@ class LevelEditor:
                 move_var.set(True)
                 if "duration" in action_data:
                     self.move_duration = action_data["duration"]
+                if not self.temp_move_position:
+                    self.move_mode = action_data.get("mode", "once")
                 if "delay" in action_data:
                     move_delay_var.set(str(action_data["delay"]))
         
@@ -860,115 +1004,129 @@ class LevelEditor:
         place_btn = tk.Button(move_frame, text="Place", command=start_place_mode, bg='lightblue')
         place_btn.pack(side='left', padx=10)
         
+        # Track mode for move
+        mode_frame = tk.Frame(checkbox_frame)
+        mode_frame.pack(anchor='w', pady=5, fill='x')
+        
+        mode_label = tk.Label(mode_frame, text="Mode:")
+        mode_label.pack(side='left', padx=(20, 5))
+        
+        mode_var = tk.StringVar(value=self.move_mode)
+        mode_menu = tk.OptionMenu(mode_frame, mode_var, "once", "loop", "ping_pong",
+                                  command=lambda value: setattr(self, 'move_mode', value))
+        mode_menu.pack(side='left', padx=5)
+        
         # Buttons frame
         button_frame = tk.Frame(root)
         button_frame.pack(pady=20)
         
         def apply_action():
-            # Save state before making changes
-            self.save_state_to_undo()
-            
-            # Get current actions to modify
-            if "actions" not in self.selected_trigger:
-                self.selected_trigger["actions"] = {}
-            
-            obj_id = str(self.selected_object["id"])
-            
-            # Initialize actions list if needed
-            if obj_id not in self.selected_trigger["actions"]:
-                self.selected_trigger["actions"][obj_id] = []
-            elif isinstance(self.selected_trigger["actions"][obj_id], dict):
-                # Convert old single action format to list
-                old_action = self.selected_trigger["actions"][obj_id]
-                self.selected_trigger["actions"][obj_id] = [old_action]
-            
-            current_actions = self.selected_trigger["actions"][obj_id]
+            # Start a new undo step; the trigger's actions are recorded as one modify
+            self.begin_edit()
+            trigger = self.selected_trigger
+            old_actions = self.snapshot_key(trigger, "actions")
             
-            # Remove existing actions of the same types we're managing
-            current_actions[:] = [action for action in current_actions 
-                                if action["action"] not in ["appear", "disappear", "move"]]
-            
-            # Clean up visual indicators for removed actions
-            self.cleanup_visual_indicators_for_object()
-            
-            # Add new actions based on checkbox states
-            actions_added = False
-            
-            if appear_var.get():
-                try:
-                    delay = float(appear_delay_var.get())
-                    if delay < 0:
-                        raise ValueError("Delay must be non-negative")
-                    
-                    action_data = {
-                        "action": "appear",
-                        "duration": 2.0,
-                        "delay": delay
-                    }
-                    current_actions.append(action_data)
-                    self.add_visual_indicator("appear")
-                    actions_added = True
-                except ValueError:
-                    messagebox.showerror("Invalid Delay", "Please enter a valid non-negative number for appear delay.")
-                    return
-            
-            if disappear_var.get():
-                try:
-                    delay = float(disappear_delay_var.get())
-                    if delay < 0:
-                        raise ValueError("Delay must be non-negative")
+            try:
+                # Get current actions to modify
+                if "actions" not in self.selected_trigger:
+                    self.selected_trigger["actions"] = {}
+                
+                obj_id = str(self.selected_object["id"])
+                
+                # Initialize actions list if needed
+                if obj_id not in self.selected_trigger["actions"]:
+                    self.selected_trigger["actions"][obj_id] = []
+                elif isinstance(self.selected_trigger["actions"][obj_id], dict):
+                    # Convert old single action format to list
+                    old_action = self.selected_trigger["actions"][obj_id]
+                    self.selected_trigger["actions"][obj_id] = [old_action]
+                
+                current_actions = self.selected_trigger["actions"][obj_id]
+                
+                # Remove existing actions of the same types we're managing
+                current_actions[:] = [action for action in current_actions 
+                                    if action["action"] not in ["appear", "disappear", "move"]]
+                
+                # Add new actions based on checkbox states
+                actions_added = False
+                
+                if appear_var.get():
+                    try:
+                        delay = float(appear_delay_var.get())
+                        if delay < 0:
+                            raise ValueError("Delay must be non-negative")
                     
-                    action_data = {
-                        "action": "disappear",
-                        "duration": 2.0,
-                        "delay": delay
-                    }
-                    current_actions.append(action_data)
-                    self.add_visual_indicator("disappear")
-                    actions_added = True
-                except ValueError:
-                    messagebox.showerror("Invalid Delay", "Please enter a valid non-negative number for disappear delay.")
-                    return
-            
-            if move_var.get():
-                if self.temp_move_position:
+                        action_data = {
+                            "action": "appear",
+                            "duration": 2.0,
+                            "delay": delay
+                        }
+                        current_actions.append(action_data)
+                        actions_added = True
+                    except ValueError:
+                        messagebox.showerror("Invalid Delay", "Please enter a valid non-negative number for appear delay.")
+                        return
+                
+                if disappear_var.get():
                     try:
-                        duration = float(time_var.get())
-                        delay = float(move_delay_var.get())
-                        if duration <= 0:
-                            raise ValueError("Duration must be positive")
+                        delay = float(disappear_delay_var.get())
                         if delay < 0:
                             raise ValueError("Delay must be non-negative")
-                        
+                    
                         action_data = {
-                            "action": "move",
-                            "duration": duration,
-                            "delay": delay,
-                            "target_x": self.temp_move_position[0],
-                            "target_y": self.temp_move_position[1]
+                            "action": "disappear",
+                            "duration": 2.0,
+                            "delay": delay
                         }
                         current_actions.append(action_data)
-                        self.add_visual_indicator("move", self.temp_move_position[0], self.temp_move_position[1])
                         actions_added = True
-                    except ValueError as e:
-                        messagebox.showerror("Invalid Input", f"Please enter valid numbers: {str(e)}")
+                    except ValueError:
+                        messagebox.showerror("Invalid Delay", "Please enter a valid non-negative number for disappear delay.")
                         return
-                else:
-                    messagebox.showinfo("Move Action", "Click the 'Place' button to set move destination first.")
-                    return
-            
-            # Clean up empty actions
-            if not current_actions:
-                del self.selected_trigger["actions"][obj_id]
-                if not self.selected_trigger["actions"]:
-                    del self.selected_trigger["actions"]
-            
-            action_count = len(current_actions) if current_actions else 0
-            print(f"Updated actions for trigger {self.selected_trigger['id']} -> object {self.selected_object['id']}: {action_count} actions")
-            
-            self.temp_move_position = None  # Clear temp position
-            root.destroy()
-            self.reset_action_mode()
+                
+                if move_var.get():
+                    if self.temp_move_position:
+                        try:
+                            duration = float(time_var.get())
+                            delay = float(move_delay_var.get())
+                            if duration <= 0:
+                                raise ValueError("Duration must be positive")
+                            if delay < 0:
+                                raise ValueError("Delay must be non-negative")
+                        
+                            action_data = {
+                                "action": "move",
+                                "duration": duration,
+                                "delay": delay,
+                                "target_x": self.temp_move_position[0],
+                                "target_y": self.temp_move_position[1]
+                            }
+                            # One-shot moves keep the original format
+                            if mode_var.get() != "once":
+                                action_data["mode"] = mode_var.get()
+                            current_actions.append(action_data)
+                            actions_added = True
+                        except ValueError as e:
+                            messagebox.showerror("Invalid Input", f"Please enter valid numbers: {str(e)}")
+                            return
+                    else:
+                        messagebox.showinfo("Move Action", "Click the 'Place' button to set move destination first.")
+                        return
+                
+                # Clean up empty actions
+                if not current_actions:
+                    del self.selected_trigger["actions"][obj_id]
+                    if not self.selected_trigger["actions"]:
+                        del self.selected_trigger["actions"]
+                
+                action_count = len(current_actions) if current_actions else 0
+                print(f"Updated actions for trigger {self.selected_trigger['id']} -> object {self.selected_object['id']}: {action_count} actions")
+                
+                self.temp_move_position = None  # Clear temp position
+                root.destroy()
+                self.reset_action_mode()
+            finally:
+                self.record_modify(trigger, "actions", old_actions)
         
         def cancel_action():
             self.temp_move_position = None  # Clear temp position
@@ -981,42 +1139,7 @@ class LevelEditor:
         cancel_btn = tk.Button(button_frame, text="Cancel", command=cancel_action, bg='lightcoral')
         cancel_btn.pack(side='left', padx=10)
         
-        root.mainloop()
-    
-    def add_visual_indicator(self, action_type, target_x=None, target_y=None):
-        """Add visual indicators for an action"""
-        if not self.selected_trigger or not self.selected_object:
-            return
-        
-        # Store connection line between trigger and object
-        self.connection_lines.append({
-            "trigger": self.selected_trigger,
-            "object": self.selected_object,
-            "action": action_type
-        })
-        
-        # For move actions, store ghost object
-        if action_type == "move" and target_x is not None and target_y is not None:
-            ghost_obj = self.selected_object.copy()
-            ghost_obj["x"] = target_x
-            ghost_obj["y"] = target_y
-            ghost_obj["original"] = self.selected_object
-            self.ghost_objects.append(ghost_obj)
-    
-    def cleanup_visual_indicators_for_object(self):
-        """Clean up visual indicators for the currently selected trigger-object pair"""
-        if not self.selected_trigger or not self.selected_object:
-            return
-        
-        # Remove connection lines for this trigger-object pair
-        self.connection_lines = [conn for conn in self.connection_lines 
-                               if not (conn["trigger"] == self.selected_trigger and 
-                                     conn["object"] == self.selected_object)]
-        
-        # Remove ghost objects for this object
-        self.ghost_objects = [ghost for ghost in self.ghost_objects 
-                            if not ("original" in ghost and 
-                                  ghost["original"] == self.selected_object)]
+        self.dialogs.run(root)
     
     def add_trigger_action(self, action_type, target_x=None, target_y=None, duration=2.0, delay=0.0):
         """Legacy method for compatibility - now redirects to new system"""
@@ -1047,15 +1170,26 @@ class LevelEditor:
         if not self.grid_visible:
             return
         
+        # Scroll the pre-rendered grid by the camera's offset within one cell
+        visible_area = pygame.Rect(self.camera_x % GRID_SIZE, self.camera_y % GRID_SIZE, SCREEN_WIDTH, GAME_HEIGHT)
+        screen.blit(self.grid_surface, (0, 0), visible_area)
+    
+    def render_grid_surface(self):
+        """Grid lines one cell larger than the game area, transparent in between"""
+        width = SCREEN_WIDTH + GRID_SIZE
+        height = GAME_HEIGHT + GRID_SIZE
+        surface = pygame.Surface((width, height))
+        surface.fill(BLACK)
+        surface.set_colorkey(BLACK)
+        
         # Vertical lines
-        start_x = -(self.camera_x % GRID_SIZE)
-        for x in range(start_x, SCREEN_WIDTH, GRID_SIZE):
-            pygame.draw.line(screen, LIGHT_GRAY, (x, 0), (x, GAME_HEIGHT))
+        for x in range(0, width, GRID_SIZE):
+            pygame.draw.line(surface, LIGHT_GRAY, (x, 0), (x, height))
         
         # Horizontal lines
-        start_y = -(self.camera_y % GRID_SIZE)
-        for y in range(start_y, GAME_HEIGHT, GRID_SIZE):
-            pygame.draw.line(screen, LIGHT_GRAY, (0, y), (SCREEN_WIDTH, y))
+        for y in range(0, height, GRID_SIZE):
+            pygame.draw.line(surface, LIGHT_GRAY, (0, y), (width, y))
+        return surface
     
     def draw_ground_reference(self):
         """Draw a reference line showing where the ground would be"""
@@ -1064,7 +1198,7 @@ class LevelEditor:
             pygame.draw.line(screen, GREEN, (0, ground_screen_y), (SCREEN_WIDTH, ground_screen_y), 2)
             
             # Draw ground label
-            text = self.small_font.render("Ground Level", True, GREEN)
+            text = self.render_label("Ground Level", GREEN)
             screen.blit(text, (10, ground_screen_y - 20))
     
     def draw_camera_view_indicators(self):
@@ -1085,137 +1219,205 @@ class LevelEditor:
         if 0 <= camera_top_screen <= GAME_HEIGHT:
             pygame.draw.line(screen, (255, 100, 100), (0, camera_top_screen), (SCREEN_WIDTH, camera_top_screen), 3)
             # Label for top boundary
-            text = self.small_font.render("Camera Top", True, (255, 100, 100))
+            text = self.render_label("Camera Top", (255, 100, 100))
             screen.blit(text, (10, camera_top_screen + 5))
             
         if 0 <= camera_bottom_screen <= GAME_HEIGHT:
             pygame.draw.line(screen, (255, 100, 100), (0, camera_bottom_screen), (SCREEN_WIDTH, camera_bottom_screen), 3)
             # Label for bottom boundary
-            text = self.small_font.render("Camera Bottom", True, (255, 100, 100))
+            text = self.render_label("Camera Bottom", (255, 100, 100))
             screen.blit(text, (10, camera_bottom_screen - 20))
             
         # Draw camera center line (horizontal)
         camera_center_screen_y = camera_center_world_y + (GAME_SCREEN_HEIGHT // 2) - self.camera_y
         if 0 <= camera_center_screen_y <= GAME_HEIGHT:
             pygame.draw.line(screen, (255, 150, 150), (0, camera_center_screen_y), (SCREEN_WIDTH, camera_center_screen_y), 1)
-            text = self.small_font.render("Camera Center", True, (255, 150, 150))
+            text = self.render_label("Camera Center", (255, 150, 150))
             screen.blit(text, (SCREEN_WIDTH - 100, camera_center_screen_y - 15))
     
+    def visible_objects(self, list_name, margin=100):
+        """Objects of a list that overlap the game view (plus a margin), in list order"""
+        return self.objects_in_rect(list_name,
+                                    self.camera_x - margin, self.camera_y - margin,
+                                    self.camera_x + SCREEN_WIDTH + margin, self.camera_y + GAME_HEIGHT + margin)
+    
+    def render_label(self, text, color, small=True):
+        """Rendered text surface, cached by text and color"""
+        key = (text, color, small)
+        label = self.label_cache.get(key)
+        if label is None:
+            if len(self.label_cache) >= LABEL_CACHE_LIMIT:
+                self.label_cache.clear()
+            font = self.small_font if small else self.font
+            label = self.label_cache[key] = font.render(text, True, color)
+        return label
+    
+    def get_sprite(self, key, render):
+        """Cached surface for key, created by render(key) on first use"""
+        sprite = self.sprite_cache.get(key)
+        if sprite is None:
+            if len(self.sprite_cache) >= SPRITE_CACHE_LIMIT:
+                self.sprite_cache.clear()
+            sprite = self.sprite_cache[key] = render(key)
+        return sprite
+    
+    def draw_block_body(self, surface, x, y, width, height):
+        """Yellow block with border and rivets"""
+        rect = pygame.Rect(x, y, width, height)
+        pygame.draw.rect(surface, YELLOW, rect)
+        pygame.draw.rect(surface, DARK_YELLOW, rect, 2)
+        
+        # Add rivets
+        rivet_size = 2
+        for rivet_x in range(x + rivet_size, x + width - rivet_size, 15):
+            for rivet_y in range(y + rivet_size, y + height - rivet_size, 15):
+                pygame.draw.circle(surface, DARK_YELLOW, (rivet_x, rivet_y), rivet_size)
+                pygame.draw.circle(surface, BLACK, (rivet_x, rivet_y), rivet_size, 1)
+    
+    def render_block_sprite(self, key):
+        _, width, height = key
+        surface = pygame.Surface((width, height))
+        self.draw_block_body(surface, 0, 0, width, height)
+        return surface
+    
+    def render_spike_sprite(self, key):
+        _, tile = key
+        # Slightly larger so the 2px outline along the bottom edge isn't clipped
+        surface = pygame.Surface((tile + 2, tile + 2), pygame.SRCALPHA)
+        points = [
+            (tile//2, 0),  # Top point
+            (0, tile),      # Bottom left
+            (tile, tile)  # Bottom right
+        ]
+        pygame.draw.polygon(surface, RED, points)
+        pygame.draw.polygon(surface, DARK_GRAY, points, 2)
+        return surface
+    
+    def render_trigger_sprite(self, key):
+        _, width, height, fill_color, border_color = key
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill(fill_color)
+        pygame.draw.rect(surface, border_color, (0, 0, width, height), 2)
+        return surface
+    
+    def render_ghost_sprite(self, key):
+        _, width, height, is_spike, alpha = key
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        if is_spike:
+            points = [
+                (GRID_SIZE//2, 0), (0, GRID_SIZE), (GRID_SIZE, GRID_SIZE)
+            ]
+            pygame.draw.polygon(surface, (255, 0, 0, alpha), points)
+        else:
+            pygame.draw.rect(surface, (255, 215, 0, alpha), (0, 0, width, height))
+        return surface
+    
     def draw_objects(self):
         """Draw all level objects"""
         # Draw yellow blocks
-        for block in self.yellow_blocks:
+        for block in self.visible_objects("yellow_blocks"):
             screen_x, screen_y = self.world_to_screen(block["x"], block["y"])
-            if -100 < screen_x < SCREEN_WIDTH + 100 and -100 < screen_y < GAME_HEIGHT + 100:
-                rect = pygame.Rect(screen_x, screen_y, block["width"], block["height"])
-                
-                # Draw yellow block with rivets
-                pygame.draw.rect(screen, YELLOW, rect)
-                pygame.draw.rect(screen, DARK_YELLOW, rect, 2)
-                
-                # Add rivets
-                rivet_size = 2
-                for x in range(screen_x + rivet_size, screen_x + block["width"] - rivet_size, 15):
-                    for y in range(screen_y + rivet_size, screen_y + block["height"] - rivet_size, 15):
-                        if 0 <= x < SCREEN_WIDTH and 0 <= y < GAME_HEIGHT:
-                            pygame.draw.circle(screen, DARK_YELLOW, (x, y), rivet_size)
-                            pygame.draw.circle(screen, BLACK, (x, y), rivet_size, 1)
-                
-                # Draw object ID if it has one
-                if "id" in block:
-                    # Highlight if selected in action mode
-                    id_color = (255, 0, 0) if block == self.selected_object else BLACK
-                    id_text = self.small_font.render(f"B{block['id']}", True, id_color)
-                    screen.blit(id_text, (screen_x + 2, screen_y + 2))
-        
-        # Draw spikes
-        for spike in self.spikes:
+            
+            # Draw yellow block with rivets
+            if block["width"] * block["height"] <= SPRITE_MAX_PIXELS:
+                screen.blit(self.get_sprite(("block", block["width"], block["height"]), self.render_block_sprite),
+                            (screen_x, screen_y))
+            else:
+                self.draw_block_body(screen, screen_x, screen_y, block["width"], block["height"])
+            
+            # Draw object ID if it has one
+            if "id" in block:
+                # Highlight if selected in action mode
+                id_color = (255, 0, 0) if block == self.selected_object else BLACK
+                screen.blit(self.render_label(f"B{block['id']}", id_color), (screen_x + 2, screen_y + 2))
+        
+        # Draw spikes (single spikes and spike strips)
+        for spike in self.visible_objects("spikes"):
             screen_x, screen_y = self.world_to_screen(spike["x"], spike["y"])
-            if -100 < screen_x < SCREEN_WIDTH + 100 and -100 < screen_y < GAME_HEIGHT + 100:
-                # Draw spike as red triangle
-                points = [
-                    (screen_x + GRID_SIZE//2, screen_y),  # Top point
-                    (screen_x, screen_y + GRID_SIZE),      # Bottom left
-                    (screen_x + GRID_SIZE, screen_y + GRID_SIZE)  # Bottom right
-                ]
-                pygame.draw.polygon(screen, RED, points)
-                pygame.draw.polygon(screen, DARK_GRAY, points, 2)
-                
-                # Draw object ID
-                if "id" in spike:
-                    # Highlight if selected in action mode
-                    id_color = (255, 255, 0) if spike == self.selected_object else WHITE
-                    id_text = self.small_font.render(f"S{spike['id']}", True, id_color)
-                    screen.blit(id_text, (screen_x + 2, screen_y + GRID_SIZE - 12))
+            # Draw each spike tile as a red triangle (only the ones on screen)
+            tile = spike.get("tile_size", GRID_SIZE)
+            tile_sprite = self.get_sprite(("spike", tile), self.render_spike_sprite)
+            first_x = screen_x + max(0, (-tile - screen_x) // tile + 1) * tile
+            first_y = screen_y + max(0, (-tile - screen_y) // tile + 1) * tile
+            last_x = min(screen_x + spike["width"], SCREEN_WIDTH)
+            last_y = min(screen_y + spike["height"], GAME_HEIGHT)
+            screen.blits([(tile_sprite, (tile_x, tile_y))
+                          for tile_x in range(first_x, last_x, tile)
+                          for tile_y in range(first_y, last_y, tile)], False)
+            
+            # Outline strips so they read as one object
+            if "tile_size" in spike:
+                pygame.draw.rect(screen, DARK_GRAY, (screen_x, screen_y, spike["width"], spike["height"]), 1)
+            
+            # Draw object ID
+            if "id" in spike:
+                # Highlight if selected in action mode
+                id_color = (255, 255, 0) if spike == self.selected_object else WHITE
+                screen.blit(self.render_label(f"S{spike['id']}", id_color), (screen_x + 2, screen_y + GRID_SIZE - 12))
         
         # Draw text elements
-        for text_elem in self.text_elements:
+        for text_elem in self.visible_objects("text_elements"):
             screen_x, screen_y = self.world_to_screen(text_elem["x"], text_elem["y"])
-            if -100 < screen_x < SCREEN_WIDTH + 100 and -100 < screen_y < GAME_HEIGHT + 100:
-                # Draw only the text (no background or border)
-                text_surface = self.font.render(text_elem["text"], True, WHITE)
-                screen.blit(text_surface, (screen_x, screen_y))
-                
-                # Draw object ID only in editor for identification
-                if "id" in text_elem:
-                    id_color = (255, 255, 0) if text_elem == self.selected_object else RED
-                    id_text = self.small_font.render(f"T{text_elem['id']}", True, id_color)
-                    screen.blit(id_text, (screen_x, screen_y + text_elem["height"]))
+            # Draw only the text (no background or border)
+            screen.blit(self.render_label(text_elem["text"], WHITE, small=False), (screen_x, screen_y))
+            
+            # Draw object ID only in editor for identification
+            if "id" in text_elem:
+                id_color = (255, 255, 0) if text_elem == self.selected_object else RED
+                screen.blit(self.render_label(f"T{text_elem['id']}", id_color), (screen_x, screen_y + text_elem["height"]))
         
         # Draw trigger boxes
-        for trigger in self.trigger_boxes:
+        for trigger in self.visible_objects("trigger_boxes"):
             screen_x, screen_y = self.world_to_screen(trigger["x"], trigger["y"])
-            if -100 < screen_x < SCREEN_WIDTH + 100 and -100 < screen_y < GAME_HEIGHT + 100:
-                rect = pygame.Rect(screen_x, screen_y, trigger["width"], trigger["height"])
-                
-                # Determine colors based on enabled state
-                enabled = trigger.get("enabled", True)
-                is_selected = trigger == self.selected_trigger
-                
-                if enabled:
-                    # Orange colors for enabled triggers
-                    fill_color = (255, 200, 0, 120) if is_selected else (255, 165, 0, 100)
-                    border_color = (255, 255, 0) if is_selected else ORANGE
-                    text_color = BLACK
-                else:
-                    # Gray colors for disabled triggers
-                    fill_color = (128, 128, 128, 120) if is_selected else (100, 100, 100, 100)
-                    border_color = (200, 200, 200) if is_selected else (128, 128, 128)
-                    text_color = (64, 64, 64)
-                
-                # Draw translucent box
+            
+            # Determine colors based on enabled state
+            enabled = trigger.get("enabled", True)
+            is_selected = trigger == self.selected_trigger
+            
+            if enabled:
+                # Orange colors for enabled triggers
+                fill_color = (255, 200, 0, 120) if is_selected else (255, 165, 0, 100)
+                border_color = (255, 255, 0) if is_selected else ORANGE
+                text_color = BLACK
+            else:
+                # Gray colors for disabled triggers
+                fill_color = (128, 128, 128, 120) if is_selected else (100, 100, 100, 100)
+                border_color = (200, 200, 200) if is_selected else (128, 128, 128)
+                text_color = (64, 64, 64)
+            
+            # Draw translucent box with border
+            if trigger["width"] * trigger["height"] <= SPRITE_MAX_PIXELS:
+                sprite_key = ("trigger", trigger["width"], trigger["height"], fill_color, border_color)
+                screen.blit(self.get_sprite(sprite_key, self.render_trigger_sprite), (screen_x, screen_y))
+            else:
                 surface = pygame.Surface((trigger["width"], trigger["height"]), pygame.SRCALPHA)
                 surface.fill(fill_color)
                 screen.blit(surface, (screen_x, screen_y))
-                
-                # Draw border
-                pygame.draw.rect(screen, border_color, rect, 2)
-                
-                # Draw "TRIGGER" text in center with status
-                status_suffix = " (OFF)" if not enabled else ""
-                trigger_text = self.font.render(f"TRIGGER{status_suffix}", True, text_color)
-                text_rect = trigger_text.get_rect(center=(screen_x + trigger["width"]//2, screen_y + trigger["height"]//2))
-                screen.blit(trigger_text, text_rect)
-                
-                # Draw object ID
-                if "id" in trigger:
-                    id_text = self.small_font.render(f"T{trigger['id']}", True, text_color)
-                    screen.blit(id_text, (screen_x + 2, screen_y + 2))
+                pygame.draw.rect(screen, border_color, (screen_x, screen_y, trigger["width"], trigger["height"]), 2)
+            
+            # Draw "TRIGGER" text in center with status
+            status_suffix = " (OFF)" if not enabled else ""
+            trigger_text = self.render_label(f"TRIGGER{status_suffix}", text_color, small=False)
+            text_rect = trigger_text.get_rect(center=(screen_x + trigger["width"]//2, screen_y + trigger["height"]//2))
+            screen.blit(trigger_text, text_rect)
+            
+            # Draw object ID
+            if "id" in trigger:
+                screen.blit(self.render_label(f"T{trigger['id']}", text_color), (screen_x + 2, screen_y + 2))
         
         # Draw pits
-        for pit in self.pits:
+        for pit in self.visible_objects("pits"):
             screen_x, _ = self.world_to_screen(pit["x"], GROUND_Y)
             screen_y = GROUND_Y - self.camera_y
             
-            if -100 < screen_x < SCREEN_WIDTH + 100 and -50 < screen_y < GAME_HEIGHT + 50:
-                rect = pygame.Rect(screen_x, screen_y, pit["width"], 40)
-                pygame.draw.rect(screen, RED, rect)
-                pygame.draw.rect(screen, DARK_GRAY, rect, 2)
-                
-                # Draw pit label
-                label = self.small_font.render("PIT", True, WHITE)
-                label_rect = label.get_rect(center=(screen_x + pit["width"]//2, screen_y + 20))
-                screen.blit(label, label_rect)
+            rect = pygame.Rect(screen_x, screen_y, pit["width"], 40)
+            pygame.draw.rect(screen, RED, rect)
+            pygame.draw.rect(screen, DARK_GRAY, rect, 2)
+            
+            # Draw pit label
+            label = self.render_label("PIT", WHITE)
+            label_rect = label.get_rect(center=(screen_x + pit["width"]//2, screen_y + 20))
+            screen.blit(label, label_rect)
         
         # Draw flag
         flag_screen_x, flag_screen_y = self.world_to_screen(self.flag_x, GROUND_Y - 80)
@@ -1246,55 +1448,51 @@ class LevelEditor:
             screen.blit(start_text, start_rect)
         
         # Draw connection lines between triggers and objects
-        for connection in self.connection_lines:
-            trigger = connection["trigger"]
-            obj = connection["object"]
-            
-            trigger_center_x = trigger["x"] + trigger["width"] // 2 - self.camera_x
-            trigger_center_y = trigger["y"] + trigger["height"] // 2 - self.camera_y
-            obj_center_x = obj["x"] + obj["width"] // 2 - self.camera_x
-            obj_center_y = obj["y"] + obj["height"] // 2 - self.camera_y
-            
-            # Draw brown connection line
-            if (-50 < trigger_center_x < SCREEN_WIDTH + 50 and -50 < trigger_center_y < GAME_HEIGHT + 50 and
-                -50 < obj_center_x < SCREEN_WIDTH + 50 and -50 < obj_center_y < GAME_HEIGHT + 50):
-                pygame.draw.line(screen, BROWN, (trigger_center_x, trigger_center_y), (obj_center_x, obj_center_y), 2)
+        for connections in self.connection_lines.values():
+            for connection in connections:
+                trigger = self.objects_by_id.get(connection["trigger"])
+                obj = self.objects_by_id.get(connection["object"])
+                if trigger is None or obj is None:
+                    continue  # Target was erased or never existed
+                
+                trigger_center_x = trigger["x"] + trigger["width"] // 2 - self.camera_x
+                trigger_center_y = trigger["y"] + trigger["height"] // 2 - self.camera_y
+                obj_center_x = obj["x"] + obj["width"] // 2 - self.camera_x
+                obj_center_y = obj["y"] + obj["height"] // 2 - self.camera_y
                 
-                # Draw small circle at connection points
-                pygame.draw.circle(screen, BROWN, (int(trigger_center_x), int(trigger_center_y)), 3)
-                pygame.draw.circle(screen, BROWN, (int(obj_center_x), int(obj_center_y)), 3)
+                # Draw brown connection line
+                if (-50 < trigger_center_x < SCREEN_WIDTH + 50 and -50 < trigger_center_y < GAME_HEIGHT + 50 and
+                    -50 < obj_center_x < SCREEN_WIDTH + 50 and -50 < obj_center_y < GAME_HEIGHT + 50):
+                    pygame.draw.line(screen, BROWN, (trigger_center_x, trigger_center_y), (obj_center_x, obj_center_y), 2)
+                    
+                    # Draw small circle at connection points
+                    pygame.draw.circle(screen, BROWN, (int(trigger_center_x), int(trigger_center_y)), 3)
+                    pygame.draw.circle(screen, BROWN, (int(obj_center_x), int(obj_center_y)), 3)
         
         # Draw ghost objects for move actions
-        for ghost in self.ghost_objects:
-            screen_x, screen_y = self.world_to_screen(ghost["x"], ghost["y"])
-            if -100 < screen_x < SCREEN_WIDTH + 100 and -100 < screen_y < GAME_HEIGHT + 100:
-                # Draw translucent ghost object
-                surface = pygame.Surface((ghost["width"], ghost["height"]), pygame.SRCALPHA)
+        for ghosts in self.ghost_objects.values():
+            for ghost in ghosts:
+                orig = self.objects_by_id.get(ghost["original"])
+                if orig is None:
+                    continue
+                screen_x, screen_y = self.world_to_screen(ghost["x"], ghost["y"])
+                if not (-100 < screen_x < SCREEN_WIDTH + 100 and -100 < screen_y < GAME_HEIGHT + 100):
+                    continue
                 
-                if "spike" in ghost and ghost.get("spike", False):
-                    # Ghost spike
-                    points = [
-                        (GRID_SIZE//2, 0), (0, GRID_SIZE), (GRID_SIZE, GRID_SIZE)
-                    ]
-                    pygame.draw.polygon(surface, (255, 0, 0, 100), points)
-                else:
-                    # Ghost yellow block
-                    pygame.draw.rect(surface, (255, 215, 0, 100), (0, 0, ghost["width"], ghost["height"]))
-                
-                screen.blit(surface, (screen_x, screen_y))
+                # Draw translucent ghost object (spike or yellow block) the size of the original
+                sprite_key = ("ghost", orig["width"], orig["height"], bool(orig.get("spike", False)), 100)
+                screen.blit(self.get_sprite(sprite_key, self.render_ghost_sprite), (screen_x, screen_y))
                 
                 # Draw arrow from original to ghost
-                orig = ghost["original"]
                 orig_center_x = orig["x"] + orig["width"] // 2 - self.camera_x
                 orig_center_y = orig["y"] + orig["height"] // 2 - self.camera_y
-                ghost_center_x = screen_x + ghost["width"] // 2
-                ghost_center_y = screen_y + ghost["height"] // 2
+                ghost_center_x = screen_x + orig["width"] // 2
+                ghost_center_y = screen_y + orig["height"] // 2
                 
                 # Draw dark green arrow
                 pygame.draw.line(screen, (0, 100, 0), (orig_center_x, orig_center_y), (ghost_center_x, ghost_center_y), 3)
                 
                 # Draw arrowhead
-                import math
                 angle = math.atan2(ghost_center_y - orig_center_y, ghost_center_x - orig_center_x)
                 arrow_length = 10
                 arrow_angle = 0.5
@@ -1316,20 +1514,10 @@ class LevelEditor:
             screen_x, screen_y = self.world_to_screen(snapped_x, snapped_y)
             
             if -100 < screen_x < SCREEN_WIDTH + 100 and -100 < screen_y < GAME_HEIGHT + 100:
-                # Draw translucent cursor object
-                surface = pygame.Surface((self.ghost_cursor_object["width"], self.ghost_cursor_object["height"]), pygame.SRCALPHA)
-                
-                if "spike" in self.ghost_cursor_object and self.ghost_cursor_object.get("spike", False):
-                    # Ghost spike at cursor
-                    points = [
-                        (GRID_SIZE//2, 0), (0, GRID_SIZE), (GRID_SIZE, GRID_SIZE)
-                    ]
-                    pygame.draw.polygon(surface, (255, 0, 0, 150), points)
-                else:
-                    # Ghost yellow block at cursor
-                    pygame.draw.rect(surface, (255, 215, 0, 150), (0, 0, self.ghost_cursor_object["width"], self.ghost_cursor_object["height"]))
-                
-                screen.blit(surface, (screen_x, screen_y))
+                # Draw translucent cursor object (spike or yellow block)
+                cursor = self.ghost_cursor_object
+                sprite_key = ("ghost", cursor["width"], cursor["height"], bool(cursor.get("spike", False)), 150)
+                screen.blit(self.get_sprite(sprite_key, self.render_ghost_sprite), (screen_x, screen_y))
     
     def draw_drag_preview(self):
         """Draw preview of object being dragged"""
@@ -1448,15 +1636,41 @@ class LevelEditor:
         info_text = f"Level: {self.level_name} | Blocks: {len(self.yellow_blocks)} | Pits: {len(self.pits)} | Spikes: {len(self.spikes)} | Text: {len(self.text_elements)} | Triggers: {len(self.trigger_boxes)}"
         info = self.small_font.render(info_text, True, WHITE)
         screen.blit(info, (10, GAME_HEIGHT + 75))
+        
+        # Save progress / result
+        status = self.save_status
+        if status:
+            name = os.path.basename(status["filename"])
+            if status["stage"] != "done":
+                elapsed_ms = (time.perf_counter() - status["started"]) * 1000
+                save_text = f"{status['label']}: {name} ({status['stage']}, {elapsed_ms:.0f} ms)"
+                save_color = YELLOW
+            elif status["error"]:
+                save_text = f"{status['label']} failed: {status['error']}"
+                save_color = RED
+            else:
+                save_text = f"{status['label']}d {name} in {status['elapsed_ms']:.0f} ms"
+                save_color = GREEN
+            save_info = self.small_font.render(save_text, True, save_color)
+            screen.blit(save_info, (SCREEN_WIDTH - save_info.get_width() - 10, GAME_HEIGHT + 75))
+        elif self.edit_count != self.saved_edit_count:
+            unsaved = self.small_font.render("Unsaved changes", True, LIGHT_GRAY)
+            screen.blit(unsaved, (SCREEN_WIDTH - unsaved.get_width() - 10, GAME_HEIGHT + 75))
     
     def draw_sky_background(self):
         """Draw gradient sky background"""
+        screen.blit(self.sky_surface, (0, 0))
+    
+    def render_sky_surface(self):
+        """Gradient sky for the game area, rendered once"""
+        surface = pygame.Surface((SCREEN_WIDTH, GAME_HEIGHT))
         for y in range(GAME_HEIGHT):
             ratio = y / GAME_HEIGHT
             r = int(SKY_BLUE_TOP[0] * (1 - ratio) + SKY_BLUE_BOTTOM[0] * ratio)
             g = int(SKY_BLUE_TOP[1] * (1 - ratio) + SKY_BLUE_BOTTOM[1] * ratio)
             b = int(SKY_BLUE_TOP[2] * (1 - ratio) + SKY_BLUE_BOTTOM[2] * ratio)
-            pygame.draw.line(screen, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+            pygame.draw.line(surface, (r, g, b), (0, y), (SCREEN_WIDTH, y))
+        return surface
     
     def validate_level(self):
         """Check if level has required elements"""
@@ -1470,14 +1684,9 @@ class LevelEditor:
         is_valid, error_msg = self.validate_level()
         if not is_valid:
             try:
-                import tkinter as tk
-                from tkinter import messagebox
-                root = tk.Tk()
-                root.withdraw()
-                messagebox.showwarning("Invalid Level", error_msg)
-                root.destroy()
+                self.dialogs.show_warning("Invalid Level", error_msg)
                 return
-            except ImportError:
+            except tk.TclError:
                 print(f"Cannot save: {error_msg}")
                 return
         
@@ -1486,16 +1695,9 @@ class LevelEditor:
         
         # Simple input method - you could enhance this with a GUI text box
         try:
-            import tkinter as tk
-            from tkinter import simpledialog
-            
-            root = tk.Tk()
-            root.withdraw()  # Hide the main window
-            
-            new_name = simpledialog.askstring("Save Level", 
-                                            f"Enter level name:", 
-                                            initialvalue=self.level_name)
-            root.destroy()
+            new_name = self.dialogs.ask_string("Save Level", 
+                                               f"Enter level name:", 
+                                               initialvalue=self.level_name)
             
             if new_name:
                 self.level_name = new_name.replace(" ", "_").lower()
@@ -1503,20 +1705,14 @@ class LevelEditor:
             else:
                 print("Save cancelled")
                 
-        except ImportError:
-            # Fallback if tkinter not available
+        except tk.TclError:
+            # Fallback if Tk can't start (e.g. no display)
             print("Using current name for save")
             self.save_level()
     
     def prompt_load_level(self):
         """Prompt user for level name and load"""
         try:
-            import tkinter as tk
-            from tkinter import simpledialog
-            
-            root = tk.Tk()
-            root.withdraw()
-            
             # List available levels from maps directory
             available_levels = []
             if os.path.exists(self.maps_dir):
@@ -1527,9 +1723,8 @@ class LevelEditor:
             
             level_list = ", ".join(available_levels) if available_levels else "No levels found"
             
-            load_name = simpledialog.askstring("Load Level", 
-                                             f"Enter level name to load:\nAvailable: {level_list}")
-            root.destroy()
+            load_name = self.dialogs.ask_string("Load Level", 
+                                                f"Enter level name to load:\nAvailable: {level_list}")
             
             if load_name:
                 self.level_name = load_name.replace(" ", "_").lower()
@@ -1537,15 +1732,73 @@ class LevelEditor:
             else:
                 print("Load cancelled")
                 
-        except ImportError:
+        except tk.TclError:
             print("Using current name for load")
             self.load_level()
 
-    def save_level(self):
-        """Save current level to JSON file"""
+    def save_level(self, wait=False, kind="save"):
+        """Save current level to JSON file (written in the background unless wait is set).
+        kind is "save", "autosave" (to a side file) or "test" (a copy for the game, not a real save)."""
+        filename = os.path.join(self.maps_dir, f"{self.level_name}.json")
+        if kind == "autosave":
+            filename += ".autosave"
+        
+        # Saves to the same file must not overlap
+        self.finish_saving()
+        
+        status = {
+            "kind": kind,
+            "label": {"save": "Save", "autosave": "Autosave", "test": "Test save"}[kind],
+            "filename": filename,
+            "stage": "snapshot",
+            "started": time.perf_counter(),
+            "elapsed_ms": None,
+            "error": None,
+            "edit_count": self.edit_count,
+            "reported": False,
+            # Records before this offset of this journal are covered by the saved file
+            "level_name": self.level_name,
+            "journal_path": self.journal_path,
+            "journal_offset": None
+        }
+        if kind == "save" and self.journal_file is not None:
+            self.journal_file.flush()
+            status["journal_offset"] = self.journal_file.tell()
+        self.save_status = status
+        snapshot = self.snapshot_level()
+        self.last_save_ticks = pygame.time.get_ticks()
+        
+        self.save_thread = threading.Thread(target=self.write_level, args=(snapshot, filename, status), daemon=True)
+        self.save_thread.start()
+        if wait:
+            self.finish_saving()
+    
+    def snapshot_level(self):
+        """Cheap copy of everything save_level writes, safe to serialise on another thread.
+        Objects are shared: only trigger actions are edited in place, so only they are copied."""
+        return {
+            "level_name": self.level_name,
+            "start_x": self.start_x,
+            "flag_x": self.flag_x,
+            "yellow_blocks": list(self.yellow_blocks),
+            "pits": list(self.pits),
+            "spikes": list(self.spikes),
+            "trigger_boxes": [(trigger, self.copy_actions(trigger.get("actions", {})), trigger.get("enabled", True))
+                              for trigger in self.trigger_boxes],
+            "text_elements": list(self.text_elements)
+        }
+    
+    def copy_actions(self, actions):
+        """Copy of a trigger's actions (action dicts only hold plain values, so two levels suffice)"""
+        return {target_id: [dict(action) for action in target_actions] if isinstance(target_actions, list)
+                else dict(target_actions)
+                for target_id, target_actions in actions.items()}
+    
+    def build_level_data(self, snapshot):
+        """Level JSON structure from a snapshot_level() snapshot"""
         # Convert yellow blocks to proper format
         yellow_blocks = []
-        for block in self.yellow_blocks:
+        for block in snapshot["yellow_blocks"]:
             yellow_blocks.append({
                 "x": block["x"],
                 "y": block["y"],
@@ -1554,33 +1807,44 @@ class LevelEditor:
                 "id": block.get("id", 0)
             })
         
-        # Convert spikes to proper format
+        # Convert spikes to proper format (strips are stored as one rect plus tile size)
         spikes = []
-        for spike in self.spikes:
-            spikes.append({
-                "x": spike["x"],
-                "y": spike["y"],
-                "width": spike["width"],
-                "height": spike["height"],
-                "id": spike.get("id", 0)
-            })
+        spike_strips = []
+        for spike in snapshot["spikes"]:
+            if "tile_size" in spike:
+                spike_strips.append({
+                    "x": spike["x"],
+                    "y": spike["y"],
+                    "width": spike["width"],
+                    "height": spike["height"],
+                    "tile_size": spike["tile_size"],
+                    "id": spike.get("id", 0)
+                })
+            else:
+                spikes.append({
+                    "x": spike["x"],
+                    "y": spike["y"],
+                    "width": spike["width"],
+                    "height": spike["height"],
+                    "id": spike.get("id", 0)
+                })
         
         # Convert trigger boxes to proper format
         trigger_boxes = []
-        for trigger in self.trigger_boxes:
+        for trigger, actions, enabled in snapshot["trigger_boxes"]:
             trigger_boxes.append({
                 "x": trigger["x"],
                 "y": trigger["y"],
                 "width": trigger["width"],
                 "height": trigger["height"],
                 "id": trigger.get("id", 0),
-                "actions": trigger.get("actions", {}),
-                "enabled": trigger.get("enabled", True)
+                "actions": actions,
+                "enabled": enabled
             })
         
         # Convert text elements to proper format
         text_elements = []
-        for text in self.text_elements:
+        for text in snapshot["text_elements"]:
             text_elements.append({
                 "x": text["x"],
                 "y": text["y"],
@@ -1591,57 +1855,108 @@ class LevelEditor:
             })
         
         level_data = {
-            "name": f"{self.level_name.replace('_', ' ').title()}",
+            "name": f"{snapshot['level_name'].replace('_', ' ').title()}",
             "start_position": {
-                "x": self.start_x,
+                "x": snapshot["start_x"],
                 "y": GROUND_Y - 100
             },
             "yellow_blocks": yellow_blocks,
-            "pits": self.pits,
+            "pits": snapshot["pits"],
             "spikes": spikes,
+            "spike_strips": spike_strips,
             "trigger_boxes": trigger_boxes,
             "text_elements": text_elements,
             "flag": {
-                "x": self.flag_x
+                "x": snapshot["flag_x"]
             }
         }
+        return level_data
         
-        filename = os.path.join(self.maps_dir, f"{self.level_name}.json")
+    
+    def write_level(self, snapshot, filename, status):
+        """Worker thread: serialise a snapshot and atomically replace the level file"""
+        temp_filename = filename + ".tmp"
         try:
-            with open(filename, 'w') as f:
-                json.dump(level_data, f, indent=2)
-            print(f"Level saved as {filename}")
+            status["stage"] = "serialising"
+            text = json.dumps(self.build_level_data(snapshot), indent=2)
+            
+            # Write next to the target and swap it in, so a crash never leaves a truncated level
+            status["stage"] = "writing"
+            with open(temp_filename, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_filename, filename)
         except Exception as e:
-            print(f"Error saving level: {e}")
+            status["error"] = str(e)
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+        status["elapsed_ms"] = (time.perf_counter() - status["started"]) * 1000
+        status["stage"] = "done"
+    
+    def finish_saving(self):
+        """Wait for a save in progress and apply its result (before the level or its journal changes)"""
+        if self.save_thread:
+            self.save_thread.join()
+            self.report_saving(pygame.time.get_ticks())
+    
+    def update_saving(self):
+        """Report finished saves and start an autosave when it is due (called every frame)"""
+        now = pygame.time.get_ticks()
+        self.report_saving(now)
+        
+        saving = self.save_thread is not None and self.save_thread.is_alive()
+        if (self.edit_count > max(self.saved_edit_count, self.autosaved_edit_count) and not saving and
+                now - self.last_save_ticks >= AUTOSAVE_INTERVAL_MS):
+            self.save_level(kind="autosave")
+    
+    def report_saving(self, now):
+        status = self.save_status
+        if status:
+            if status["stage"] != "done":
+                self.needs_redraw = True  # Keep the progress display moving
+            elif not status["reported"]:
+                status["reported"] = True
+                status["finished_ticks"] = now
+                self.needs_redraw = True
+                if status["error"]:
+                    print(f"Error saving level: {status['error']}")
+                elif status["kind"] == "save":
+                    print(f"Level saved as {status['filename']}")
+                    self.saved_edit_count = max(self.saved_edit_count, status["edit_count"])
+                    self.saved_level_name = status["level_name"]
+                    # Only the journal the save was taken from can be compacted
+                    if (status["journal_offset"] is not None and self.journal_file is not None and
+                            status["journal_path"] == self.journal_path):
+                        self.compact_journal(status)
+                elif status["kind"] == "autosave":
+                    self.autosaved_edit_count = max(self.autosaved_edit_count, status["edit_count"])
+                # A test save only writes a copy for the game; the level itself stays unsaved
+            elif now - status["finished_ticks"] > SAVE_STATUS_MS:
+                self.save_status = None
+                self.needs_redraw = True
     
     def load_level(self):
         """Load level from JSON file"""
-        # Save current state before loading
-        self.save_state_to_undo()
+        # Loading is one undo step: every old object removed, every new one added
+        self.begin_edit()
         
         filename = os.path.join(self.maps_dir, f"{self.level_name}.json")
         try:
             with open(filename, 'r') as f:
                 level_data = json.load(f)
             
-            # Clear current level
-            self.yellow_blocks = []
-            self.pits = []
-            self.spikes = []
-            self.trigger_boxes = []
-            self.text_elements = []
-            
-            # Clear visual indicators
-            self.connection_lines = []
-            self.ghost_objects = []
+            # The previous level's journal ends here; loading itself isn't journaled.
+            # A finished save still has to be applied to it first.
+            self.finish_saving()
+            self.close_journal(delete=True)
             
-            # Clear visual indicators
-            self.connection_lines = []
-            self.ghost_objects = []
+            # Clear current level and its visual indicators
+            self.clear_level_objects()
             
             # Load yellow blocks
             for block_data in level_data.get("yellow_blocks", []):
-                self.yellow_blocks.append({
+                self.add_object("yellow_blocks", {
                     "x": block_data["x"],
                     "y": block_data["y"],
                     "width": block_data["width"],
@@ -1651,7 +1966,7 @@ class LevelEditor:
             
             # Load spikes
             for spike_data in level_data.get("spikes", []):
-                self.spikes.append({
+                self.add_object("spikes", {
                     "x": spike_data["x"],
                     "y": spike_data["y"],
                     "width": spike_data["width"],
@@ -1659,9 +1974,20 @@ class LevelEditor:
                     "id": spike_data.get("id", 0)
                 })
             
+            # Load spike strips
+            for strip_data in level_data.get("spike_strips", []):
+                self.add_object("spikes", {
+                    "x": strip_data["x"],
+                    "y": strip_data["y"],
+                    "width": strip_data["width"],
+                    "height": strip_data["height"],
+                    "tile_size": strip_data.get("tile_size", GRID_SIZE),
+                    "id": strip_data.get("id", 0)
+                })
+            
             # Load trigger boxes
             for trigger_data in level_data.get("trigger_boxes", []):
-                self.trigger_boxes.append({
+                self.add_object("trigger_boxes", {
                     "x": trigger_data["x"],
                     "y": trigger_data["y"],
                     "width": trigger_data["width"],
@@ -1673,7 +1999,7 @@ class LevelEditor:
             
             # Load text elements
             for text_data in level_data.get("text_elements", []):
-                self.text_elements.append({
+                self.add_object("text_elements", {
                     "x": text_data["x"],
                     "y": text_data["y"],
                     "width": text_data["width"],
@@ -1684,15 +2010,16 @@ class LevelEditor:
                 self.next_object_id = max(self.next_object_id, text_data.get("id", 0) + 1)
             
             # Load pits
-            self.pits = level_data.get("pits", [])
+            for pit_data in level_data.get("pits", []):
+                self.add_object("pits", pit_data)
             
             # Load flag
             flag_data = level_data.get("flag", {"x": 2000})
-            self.flag_x = flag_data["x"]
+            self.set_flag(flag_data["x"])
             
             # Load start position
             start_data = level_data.get("start_position", {"x": 100})
-            self.start_x = start_data["x"]
+            self.set_start(start_data["x"])
             
             # Update next object ID to avoid conflicts
             max_id = 0
@@ -1701,38 +2028,44 @@ class LevelEditor:
                     max_id = obj["id"]
             self.next_object_id = max_id + 1
             
-            # Rebuild visual indicators after loading
-            self.rebuild_visual_indicators()
+            print(f"Loaded {sum(map(len, self.connection_lines.values()))} connections and "
+                  f"{sum(map(len, self.ghost_objects.values()))} ghost objects")
             
+            # A freshly loaded level has nothing to autosave
+            self.saved_edit_count = self.edit_count
+            self.saved_level_name = self.level_name
             print(f"Level loaded from {filename}")
             
         except FileNotFoundError:
             print(f"Level file {filename} not found")
         except Exception as e:
             print(f"Error loading level: {e}")
+        
+        if self.journal_file is None:
+            self.open_journal(has_base=True)
     
     def new_level(self):
         """Create a new empty level"""
-        # Save current state before clearing
-        self.save_state_to_undo()
+        # Clearing is one undo step
+        self.begin_edit()
+        self.finish_saving()
+        self.close_journal(delete=True)
         
-        self.yellow_blocks = []
-        self.pits = []
-        self.spikes = []
-        self.trigger_boxes = []
-        self.text_elements = []
+        # Remove all objects and visual indicators
+        self.clear_level_objects()
         
-        # Clear visual indicators
-        self.connection_lines = []
-        self.ghost_objects = []
-        
-        self.flag_x = 2000
-        self.start_x = 100
+        self.set_flag(2000)
+        self.set_start(100)
         self.camera_x = 0
         self.camera_y = 0
         self.next_object_id = 1
         self.selected_trigger = None
         self.action_mode = False
+        self.saved_edit_count = self.edit_count
+        # Unsaved levels all journal under the startup name, which is what a restart recovers
+        self.level_name = "new_level"
+        self.saved_level_name = self.level_name
+        self.open_journal(has_base=False)
         print("New level created")
     
     def test_level(self):
@@ -1741,21 +2074,16 @@ class LevelEditor:
         is_valid, error_msg = self.validate_level()
         if not is_valid:
             try:
-                import tkinter as tk
-                from tkinter import messagebox
-                root = tk.Tk()
-                root.withdraw()
-                messagebox.showwarning("Invalid Level", error_msg)
-                root.destroy()
+                self.dialogs.show_warning("Invalid Level", error_msg)
                 return
-            except ImportError:
+            except tk.TclError:
                 print(f"Cannot test: {error_msg}")
                 return
         
         # Save current level as a temporary test level
         original_name = self.level_name
         self.level_name = "test_level"
-        self.save_level()
+        self.save_level(wait=True, kind="test")  # The game reads the file right away
         self.level_name = original_name
         
         # Launch the main game with the test level
@@ -1773,207 +2101,543 @@ class LevelEditor:
             world_x, world_y = self.screen_to_world(mouse_x, mouse_y)
             
             # Find trigger at mouse position
-            for trigger in self.trigger_boxes:
-                if (trigger["x"] <= world_x < trigger["x"] + trigger["width"] and
-                    trigger["y"] <= world_y < trigger["y"] + trigger["height"]):
-                    
-                    # Save state before making changes
-                    self.save_state_to_undo()
-                    
-                    # Toggle enabled state
-                    current_state = trigger.get("enabled", True)
-                    trigger["enabled"] = not current_state
-                    
-                    status = "enabled" if trigger["enabled"] else "disabled"
-                    print(f"Trigger {trigger['id']} is now {status}")
-                    return
+            for trigger in self.objects_at_point("trigger_boxes", world_x, world_y):
+                # Start a new undo step
+                self.begin_edit()
+                
+                # Toggle enabled state
+                current_state = trigger.get("enabled", True)
+                self.modify_object(trigger, "enabled", not current_state)
+                
+                status = "enabled" if trigger["enabled"] else "disabled"
+                print(f"Trigger {trigger['id']} is now {status}")
+                return
             
             print("No trigger found at mouse position. Hover over a trigger and press 'E' to toggle it.")
     
     def rebuild_visual_indicators(self):
-        """Rebuild connection lines and ghost objects from loaded level data"""
-        # Clear existing indicators
-        self.connection_lines = []
-        self.ghost_objects = []
-        
-        print("Rebuilding visual indicators...")
-        
-        # Rebuild connection lines and ghost objects from trigger actions
+        """Rebuild connection lines and ghost objects for every trigger from scratch"""
+        self.connection_lines.clear()
+        self.ghost_objects.clear()
         for trigger in self.trigger_boxes:
-            trigger_actions = trigger.get("actions", {})
-            
-            for target_id_str, action_data in trigger_actions.items():
+            self.refresh_trigger_indicators(trigger)
+        
+        print(f"Rebuilt {sum(map(len, self.connection_lines.values()))} connections and "
+              f"{sum(map(len, self.ghost_objects.values()))} ghost objects")
+    
+    def refresh_trigger_indicators(self, trigger):
+        """Recreate one trigger's connection lines and move ghosts from its actions"""
+        trigger_id = str(trigger.get("id"))
+        connections = []
+        ghosts = []
+        for target_id, target_actions in trigger.get("actions", {}).items():
+            # Old single action format
+            if isinstance(target_actions, dict):
+                target_actions = [target_actions]
+            
+            for action_data in target_actions:
                 action_type = action_data.get("action", "appear")
+                connections.append({"trigger": trigger_id, "object": str(target_id), "action": action_type})
                 
-                # Find target object by ID
-                target_object = None
-                
-                # Check all object types for the target ID
-                for obj_list, obj_type in [(self.yellow_blocks, "yellow_block"), 
-                                         (self.spikes, "spike"),
-                                         (self.trigger_boxes, "trigger")]:
-                    for obj in obj_list:
-                        if str(obj.get("id")) == str(target_id_str):
-                            target_object = obj.copy()
-                            target_object["type"] = obj_type
-                            break
-                    if target_object:
+                # Ghost object for move actions
+                if action_type == "move":
+                    target_x = action_data.get("target_x")
+                    target_y = action_data.get("target_y")
+                    if target_x is not None and target_y is not None:
+                        ghosts.append({"original": str(target_id), "x": target_x, "y": target_y})
+        
+        self.drop_trigger_indicators(trigger)
+        if connections:
+            self.connection_lines[trigger_id] = connections
+        if ghosts:
+            self.ghost_objects[trigger_id] = ghosts
+        self.needs_redraw = True
+    
+    def drop_trigger_indicators(self, trigger):
+        trigger_id = str(trigger.get("id"))
+        self.connection_lines.pop(trigger_id, None)
+        self.ghost_objects.pop(trigger_id, None)
+    
+    def journal_path_for(self, level_name, has_base):
+        """Journal file next to the map; sessions that were never saved get their own name"""
+        suffix = ".json.journal" if has_base else ".new.journal"
+        return os.path.join(self.maps_dir, f"{level_name}{suffix}")
+    
+    def journal_key(self, list_name, obj):
+        """Fields that identify an object in a journal record (list order isn't kept by saving)"""
+        if list_name == "pits":
+            return [obj.get("x"), obj.get("width")]
+        return [obj.get("x"), obj.get("y"), obj.get("width"), obj.get("height"), obj.get("id")]
+    
+    def find_journaled_object(self, list_name, key):
+        y = GROUND_Y if list_name == "pits" else key[1]
+        for obj in self.objects_at_point(list_name, key[0], y):
+            if self.journal_key(list_name, obj) == key:
+                return obj
+        return None
+    
+    def journal_write(self, record):
+        """Append one record to the journal (buffered; sync_journal makes it durable)"""
+        if self.journal_file is None:
+            return
+        self.journal_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.journal_unsynced = True
+    
+    def journal_modify(self, obj, key, old_value, value):
+        if self.journal_file is None:
+            return
+        # Address the object as it was before the change, which is how replay will find it
+        before = dict(obj)
+        if old_value is MISSING:
+            before.pop(key, None)
+        else:
+            before[key] = old_value
+        list_name = self.list_containing(obj)
+        if list_name is None:
+            return
+        object_key = self.journal_key(list_name, before)
+        if value is MISSING:
+            self.journal_write(["unset", list_name, object_key, key])
+        else:
+            self.journal_write(["modify", list_name, object_key, key, value])
+    
+    def sync_journal(self, force=False):
+        """Flush and fsync pending journal records, batched to once per JOURNAL_FSYNC_MS"""
+        if self.journal_file is None or not self.journal_unsynced:
+            return
+        now = pygame.time.get_ticks()
+        if force or now - self.journal_synced_ticks >= JOURNAL_FSYNC_MS:
+            self.journal_file.flush()
+            os.fsync(self.journal_file.fileno())
+            self.journal_unsynced = False
+            self.journal_synced_ticks = now
+    
+    def read_journal(self, path):
+        """Records of an existing journal (a torn last line from a crash is ignored)"""
+        records = []
+        try:
+            with open(path, 'r') as f:
+                header = json.loads(f.readline())
+                if header != ["journal", JOURNAL_VERSION]:
+                    return []
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
                         break
-                
-                if target_object:
-                    # Create connection line
-                    self.connection_lines.append({
-                        "trigger": trigger,
-                        "object": target_object,
-                        "action": action_type
-                    })
-                    
-                    # Create ghost object for move actions
-                    if action_type == "move":
-                        target_x = action_data.get("target_x")
-                        target_y = action_data.get("target_y")
-                        if target_x is not None and target_y is not None:
-                            ghost_obj = target_object.copy()
-                            ghost_obj["x"] = target_x
-                            ghost_obj["y"] = target_y
-                            ghost_obj["original"] = target_object
-                            self.ghost_objects.append(ghost_obj)
-                    
-                    print(f"Rebuilt: Trigger {trigger['id']} -> {action_type} -> Object {target_id_str}")
+        except (OSError, ValueError):
+            return []
+        return records
+    
+    def replay_journal_record(self, record):
+        """Re-apply one journaled change as a normal (undoable) edit"""
+        kind = record[0]
+        if kind == "add":
+            _, list_name, index, obj = record
+            self.add_object(list_name, obj, min(index, len(getattr(self, list_name))))
+            if "id" in obj:
+                self.next_object_id = max(self.next_object_id, obj["id"] + 1)
+        elif kind == "remove":
+            obj = self.find_journaled_object(record[1], record[2])
+            if obj is not None:
+                self.remove_object(record[1], obj)
+        elif kind in ("modify", "unset"):
+            obj = self.find_journaled_object(record[1], record[2])
+            if obj is not None:
+                self.modify_object(obj, record[3], record[4] if kind == "modify" else MISSING)
+        elif kind == "flag":
+            self.set_flag(record[1])
+        elif kind == "start":
+            self.set_start(record[1])
+    
+    def open_journal(self, has_base):
+        """Start journaling the current level, first replaying a journal a crash left behind"""
+        path = self.journal_path_for(self.level_name, has_base)
+        records = self.read_journal(path)
+        if records:
+            print(f"Recovering {len(records)} unsaved edits from {path} (Ctrl+Z discards them)")
+            self.begin_edit()
+            for record in records:
+                self.replay_journal_record(record)
+            self.begin_edit()
+            # The records are still relative to the same saved level, so keep appending to them
+            self.journal_file = open(path, 'a')
+        else:
+            self.journal_file = open(path, 'w')
+            self.journal_file.write(json.dumps(["journal", JOURNAL_VERSION]) + "\n")
+            self.journal_unsynced = True
+        self.journal_path = path
+        self.sync_journal(force=True)
+    
+    def close_journal(self, delete=False):
+        if self.journal_file is None:
+            return
+        self.sync_journal(force=True)
+        self.journal_file.close()
+        self.journal_file = None
+        if delete and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+    
+    def compact_journal(self, status):
+        """After a clean save only the edits made while it was written still need journaling"""
+        self.journal_file.flush()
+        with open(self.journal_path, 'r') as f:
+            f.seek(status["journal_offset"])
+            tail = f.read()
+        
+        # The new journal replaces the old one in a single step, so a crash leaves one or the other
+        path = self.journal_path_for(status["level_name"], True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w') as f:
+            f.write(json.dumps(["journal", JOURNAL_VERSION]) + "\n")
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        self.close_journal()
+        os.replace(temp_path, path)
+        if path != self.journal_path:
+            os.remove(self.journal_path)  # Saved under a new name
+        self.journal_file = open(path, 'a')
+        self.journal_path = path
+    
+    def begin_edit(self):
+        """Close the open undo step; operations recorded from now on form a new one"""
+        self.current_edit = None
+    
+    def record(self, op):
+        """Append an operation to the open undo step, opening one if needed"""
+        self.needs_redraw = True
+        self.edit_count += 1
+        if self.current_edit is None:
+            self.current_edit = []
+            self.undo_history.append([self.current_edit, 0])
+            # A new edit makes the undone steps unreachable
+            self.redo_history.clear()
+        self.current_edit.append(op)
+        
+        size = self.op_size(op)
+        self.undo_history[-1][1] += size
+        self.undo_memory += size
+        
+        # Forget the oldest steps once the history outgrows its budget
+        while self.undo_memory > UNDO_MEMORY_LIMIT and len(self.undo_history) > 1:
+            _, dropped = self.undo_history.popleft()
+            self.undo_memory -= dropped
+    
+    def op_size(self, op):
+        """Rough memory cost of one recorded operation"""
+        size = sys.getsizeof(op)
+        for value in op[1:]:
+            if isinstance(value, (dict, list)):
+                size += sys.getsizeof(value)
+        return size
+    
+    def list_containing(self, obj):
+        """Name of the object list holding obj, or None (every list is in the spatial index)"""
+        return self.spatial_index.list_name_of(obj)
+    
+    def index_of(self, items, obj):
+        """Position of obj in items by identity (dicts with equal contents are different objects)"""
+        try:
+            # list.index compares identity first, so this is usually the right one
+            index = items.index(obj)
+        except ValueError:
+            return None
+        if items[index] is obj:
+            return index
+        for index, item in enumerate(items):
+            if item is obj:
+                return index
+        return None
+    
+    def object_bounds(self, list_name, obj):
+        """World rectangle (left, top, right, bottom) an object occupies"""
+        if list_name == "pits":
+            # Pits are only defined by x and width, at ground level
+            return obj["x"], GROUND_Y, obj["x"] + obj["width"], GROUND_Y + 40
+        return obj["x"], obj["y"], obj["x"] + obj["width"], obj["y"] + obj["height"]
+    
+    def objects_in_rect(self, list_name, left, top, right, bottom):
+        """Objects of a list whose bounds overlap the rectangle, in list order"""
+        return [obj for obj in self.spatial_index.query(list_name, left, top, right, bottom)
+                if self.rectangles_overlap(self.object_bounds(list_name, obj), (left, top, right, bottom))]
+    
+    def objects_at_point(self, list_name, x, y):
+        """Objects of a list that contain the point, in list order"""
+        return self.objects_in_rect(list_name, x, y, x + 1, y + 1)
+    
+    def occupancy_keys(self, list_name, obj):
+        """Occupancy hash keys of every grid cell an object covers (text only claims its anchor cell)"""
+        left = obj["x"] // GRID_SIZE
+        top = obj["y"] // GRID_SIZE
+        if list_name == "text_elements":
+            return [(left, top, list_name)]
+        right = max((obj["x"] + obj["width"] - 1) // GRID_SIZE, left)
+        bottom = max((obj["y"] + obj["height"] - 1) // GRID_SIZE, top)
+        return [(cx, cy, list_name) for cx in range(left, right + 1) for cy in range(top, bottom + 1)]
+    
+    def cell_occupied(self, x, y, layer):
+        """Whether an object of the layer covers the grid cell containing (x, y)"""
+        return (x // GRID_SIZE, y // GRID_SIZE, layer) in self.occupied_cells
+    
+    # Primitive changes shared by editing, undo and redo; each one is journaled
+    def _insert(self, list_name, index, obj):
+        getattr(self, list_name).insert(index, obj)
+        self.journal_write(["add", list_name, index, obj])
+        self._index(list_name, obj)
+    
+    def _delete(self, list_name, index, obj):
+        items = getattr(self, list_name)
+        if index >= len(items) or items[index] is not obj:
+            index = self.index_of(items, obj)
+        del items[index]
+        self.journal_write(["remove", list_name, self.journal_key(list_name, obj)])
+        self._unindex(list_name, obj)
+    
+    def _index(self, list_name, obj):
+        """Register an object with every index (spatial, occupancy, ID, trigger indicators)"""
+        if list_name in INDEXED_LISTS:
+            self.spatial_index.insert(list_name, obj, self.object_bounds(list_name, obj))
+        if list_name in OCCUPANCY_LAYERS:
+            occupied = self.occupied_cells
+            for key in self.occupancy_keys(list_name, obj):
+                occupied[key] = occupied.get(key, 0) + 1
+        if list_name in ID_INDEXED_LISTS:
+            self.objects_by_id[str(obj.get("id"))] = obj
+        if list_name == "trigger_boxes":
+            self.refresh_trigger_indicators(obj)
+    
+    def _unindex(self, list_name, obj):
+        if list_name in INDEXED_LISTS:
+            self.spatial_index.remove(obj)
+        if list_name in OCCUPANCY_LAYERS:
+            occupied = self.occupied_cells
+            for key in self.occupancy_keys(list_name, obj):
+                if occupied[key] == 1:
+                    del occupied[key]
                 else:
-                    print(f"Warning: Target object {target_id_str} not found for trigger {trigger['id']}")
-        
-        print(f"Rebuilt {len(self.connection_lines)} connections and {len(self.ghost_objects)} ghost objects")
-    
-    def save_state_to_undo(self):
-        """Save current state to undo history"""
-        state = {
-            'yellow_blocks': [block.copy() for block in self.yellow_blocks],
-            'pits': [pit.copy() for pit in self.pits],
-            'spikes': [spike.copy() for spike in self.spikes],
-            'trigger_boxes': [trigger.copy() for trigger in self.trigger_boxes],
-            'text_elements': [text.copy() for text in self.text_elements],
-            'flag_x': self.flag_x,
-            'start_x': self.start_x,
-            'next_object_id': self.next_object_id,
-            'connection_lines': [conn.copy() for conn in self.connection_lines],
-            'ghost_objects': [ghost.copy() for ghost in self.ghost_objects]
-        }
-        
-        self.undo_history.append(state)
-        
-        # Clear redo history when new action is performed
-        self.redo_history.clear()
-        
-        # Limit undo history size
-        if len(self.undo_history) > self.max_undo_history:
-            self.undo_history.pop(0)
+                    occupied[key] -= 1
+        if list_name in ID_INDEXED_LISTS and self.objects_by_id.get(str(obj.get("id"))) is obj:
+            del self.objects_by_id[str(obj.get("id"))]
+        if list_name == "trigger_boxes":
+            self.drop_trigger_indicators(obj)
+    
+    def _set_key(self, obj, key, value):
+        old_value = obj.get(key, MISSING)
+        # Indexes are keyed by position, size and ID; move the object along when one changes
+        list_name = self.list_containing(obj) if key in INDEXED_KEYS else None
+        if list_name:
+            self._unindex(list_name, obj)
+        if value is MISSING:
+            obj.pop(key, None)
+        else:
+            obj[key] = value
+        if list_name:
+            self._index(list_name, obj)
+        self.journal_modify(obj, key, old_value, value)
+        if key == "actions":
+            self.refresh_trigger_indicators(obj)
+    
+    # Recorded operations: add, remove, modify, set_flag, set_start
+    def add_object(self, list_name, obj, index=None):
+        """Add obj to one of the editor's object lists"""
+        if index is None:
+            index = len(getattr(self, list_name))
+        self._insert(list_name, index, obj)
+        self.record(("add", list_name, index, obj))
+        return obj
+    
+    def remove_object(self, list_name, obj):
+        """Remove obj (by identity) from one of the editor's object lists"""
+        self.remove_objects(list_name, [obj])
+    
+    def remove_objects(self, list_name, objects):
+        """Remove several objects (by identity) from one list"""
+        items = getattr(self, list_name)
+        positions = [(self.index_of(items, obj), obj) for obj in objects]
+        # Back to front so recorded indices stay valid when undone in reverse
+        positions.sort(key=lambda position: -1 if position[0] is None else position[0], reverse=True)
+        for index, obj in positions:
+            if index is not None:
+                self._delete(list_name, index, obj)
+                self.record(("remove", list_name, index, obj))
+    
+    def remove_matching(self, list_name, predicate):
+        """Remove every object the predicate accepts in one pass; returns them in list order"""
+        items = getattr(self, list_name)
+        removed = []
+        # Back to front so recorded indices stay valid when undone in reverse
+        for index in range(len(items) - 1, -1, -1):
+            obj = items[index]
+            if predicate(obj):
+                self._delete(list_name, index, obj)
+                self.record(("remove", list_name, index, obj))
+                removed.append(obj)
+        removed.reverse()
+        return removed
+    
+    def modify_object(self, obj, key, value):
+        """Set one field of an object"""
+        old_value = obj.get(key, MISSING)
+        self._set_key(obj, key, value)
+        self.record(("modify", obj, key, old_value, value))
+    
+    def snapshot_key(self, obj, key):
+        """Independent copy of a field, taken before it is edited in place"""
+        value = obj.get(key, MISSING)
+        return value if value is MISSING else copy.deepcopy(value)
+    
+    def record_modify(self, obj, key, old_value):
+        """Record a field that was edited in place since snapshot_key() returned old_value"""
+        new_value = self.snapshot_key(obj, key)
+        if new_value is MISSING and old_value is MISSING:
+            return
+        if new_value is not MISSING and old_value is not MISSING and new_value == old_value:
+            return  # Nothing changed
+        self.record(("modify", obj, key, old_value, new_value))
+        self.journal_modify(obj, key, old_value, new_value)
+        if key == "actions":
+            self.refresh_trigger_indicators(obj)
+    
+    def _set_flag(self, x):
+        self.flag_x = x
+        self.journal_write(["flag", x])
+    
+    def _set_start(self, x):
+        self.start_x = x
+        self.journal_write(["start", x])
+    
+    def set_flag(self, x):
+        self.record(("set_flag", self.flag_x, x))
+        self._set_flag(x)
+    
+    def set_start(self, x):
+        self.record(("set_start", self.start_x, x))
+        self._set_start(x)
+    
+    def clear_level_objects(self):
+        """Remove every object and pit (recorded); trigger indicators go with their triggers"""
+        for list_name in ("yellow_blocks", "pits", "spikes", "trigger_boxes", "text_elements"):
+            self.remove_matching(list_name, lambda obj: True)
+    
+    def apply_op(self, op, undo=False):
+        """Replay an operation, or its inverse when undoing"""
+        self.needs_redraw = True
+        self.edit_count += 1
+        kind = op[0]
+        if kind in ("add", "remove"):
+            _, list_name, index, obj = op
+            if (kind == "add") != undo:
+                self._insert(list_name, index, obj)
+            else:
+                self._delete(list_name, index, obj)
+        elif kind == "modify":
+            _, obj, key, old_value, new_value = op
+            value = old_value if undo else new_value
+            # Copy so later in-place edits can't change the recorded value
+            self._set_key(obj, key, value if value is MISSING else copy.deepcopy(value))
+        elif kind == "set_flag":
+            self._set_flag(op[1] if undo else op[2])
+        elif kind == "set_start":
+            self._set_start(op[1] if undo else op[2])
     
     def undo_last_action(self):
         """Undo the last action"""
+        self.begin_edit()
         if not self.undo_history:
             print("Nothing to undo")
             return
         
-        # Save current state to redo history before undoing
-        current_state = {
-            'yellow_blocks': [block.copy() for block in self.yellow_blocks],
-            'pits': [pit.copy() for pit in self.pits],
-            'spikes': [spike.copy() for spike in self.spikes],
-            'trigger_boxes': [trigger.copy() for trigger in self.trigger_boxes],
-            'text_elements': [text.copy() for text in self.text_elements],
-            'flag_x': self.flag_x,
-            'start_x': self.start_x,
-            'next_object_id': self.next_object_id,
-            'connection_lines': [line.copy() for line in self.connection_lines],
-            'ghost_objects': [ghost.copy() for ghost in self.ghost_objects]
-        }
-        self.redo_history.append(current_state)
+        entry = self.undo_history.pop()
+        self.undo_memory -= entry[1]
+        for op in reversed(entry[0]):
+            self.apply_op(op, undo=True)
+        self.redo_history.append(entry)
         
-        # Limit redo history size
-        if len(self.redo_history) > self.max_undo_history:
-            self.redo_history.pop(0)
-        
-        # Restore the last saved state
-        last_state = self.undo_history.pop()
-        
-        self.yellow_blocks = last_state['yellow_blocks']
-        self.pits = last_state['pits']
-        self.spikes = last_state['spikes']
-        self.trigger_boxes = last_state['trigger_boxes']
-        self.text_elements = last_state.get('text_elements', [])
-        self.flag_x = last_state['flag_x']
-        self.start_x = last_state['start_x']
-        self.next_object_id = last_state['next_object_id']
-        self.connection_lines = last_state['connection_lines']
-        self.ghost_objects = last_state['ghost_objects']
-        
-        print("Undid last action")
+        print(f"Undid last action ({len(entry[0])} operations)")
     
     def redo_last_action(self):
         """Redo the last undone action"""
+        self.begin_edit()
         if not self.redo_history:
             print("Nothing to redo")
             return
         
-        # Save current state to undo history before redoing
-        current_state = {
-            'yellow_blocks': [block.copy() for block in self.yellow_blocks],
-            'pits': [pit.copy() for pit in self.pits],
-            'spikes': [spike.copy() for spike in self.spikes],
-            'trigger_boxes': [trigger.copy() for trigger in self.trigger_boxes],
-            'text_elements': [text.copy() for text in self.text_elements],
-            'flag_x': self.flag_x,
-            'start_x': self.start_x,
-            'next_object_id': self.next_object_id,
-            'connection_lines': [line.copy() for line in self.connection_lines],
-            'ghost_objects': [ghost.copy() for ghost in self.ghost_objects]
-        }
-        self.undo_history.append(current_state)
-        
-        # Limit undo history size
-        if len(self.undo_history) > self.max_undo_history:
-            self.undo_history.pop(0)
+        entry = self.redo_history.pop()
+        for op in entry[0]:
+            self.apply_op(op)
+        self.undo_history.append(entry)
+        self.undo_memory += entry[1]
         
-        # Restore the redo state
-        redo_state = self.redo_history.pop()
-        
-        self.yellow_blocks = redo_state['yellow_blocks']
-        self.pits = redo_state['pits']
-        self.spikes = redo_state['spikes']
-        self.trigger_boxes = redo_state['trigger_boxes']
-        self.text_elements = redo_state.get('text_elements', [])
-        self.flag_x = redo_state['flag_x']
-        self.start_x = redo_state['start_x']
-        self.next_object_id = redo_state['next_object_id']
-        self.connection_lines = redo_state['connection_lines']
-        self.ghost_objects = redo_state['ghost_objects']
-        
-        print("Redid last action")
+        print(f"Redid last action ({len(entry[0])} operations)")
+    
+    def camera_keys_held(self):
+        """Whether a camera key is down (the camera keeps moving without new events)"""
+        keys = pygame.key.get_pressed()
+        return any(keys[key] for key in (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d,
+                                         pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s))
+    
+    def wait_for_events(self):
+        """Events for this frame; blocks (up to IDLE_WAIT_MS) when nothing needs drawing"""
+        if REDRAW_ON_DEMAND and not self.needs_redraw and not self.camera_keys_held():
+            event = pygame.event.wait(IDLE_WAIT_MS)
+            if event.type == pygame.NOEVENT:
+                return []
+            return [event] + pygame.event.get()
+        return pygame.event.get()
+    
+    def events_need_redraw(self, events):
+        """Mouse motion only changes the picture while dragging or placing in action mode"""
+        for event in events:
+            if event.type != pygame.MOUSEMOTION or self.dragging or self.action_mode:
+                return True
+        return False
+    
+    def draw_frame(self):
+        """Draw everything"""
+        self.draw_sky_background()
+        self.draw_grid()
+        self.draw_ground_reference()
+        self.draw_camera_view_indicators()
+        self.draw_objects()
+        self.draw_drag_preview()
+        self.draw_action_instructions()  # Draw instructions at top
+        self.draw_ui()
+        
+        pygame.display.flip()
     
     def run(self):
         """Main editor loop"""
         running = True
         
         while running:
-            events = pygame.event.get()
+            events = self.wait_for_events()
+            camera = (self.camera_x, self.camera_y)
             running = self.handle_input(events)
+            self.update_saving()
+            self.sync_journal()
             
-            # Draw everything
-            self.draw_sky_background()
-            self.draw_grid()
-            self.draw_ground_reference()
-            self.draw_camera_view_indicators()
-            self.draw_objects()
-            self.draw_drag_preview()
-            self.draw_action_instructions()  # Draw instructions at top
-            self.draw_ui()
-            
-            pygame.display.flip()
+            if self.events_need_redraw(events) or camera != (self.camera_x, self.camera_y):
+                self.needs_redraw = True
+            
+            if self.needs_redraw or not REDRAW_ON_DEMAND:
+                self.needs_redraw = False
+                self.draw_frame()
             clock.tick(FPS)
         
+        self.shutdown()
         pygame.quit()
     
+    def shutdown(self):
+        """Finish saving and close the journal before the editor exits"""
+        # Let a save in progress finish before exiting
+        self.finish_saving()
+        
+        # Unsaved edits stay in the journal and are recovered the next time the level is opened;
+        # it can only go once the level's own file holds every edit
+        saved = self.edit_count == self.saved_edit_count and self.saved_level_name == self.level_name
+        self.close_journal(delete=saved)
+    
     def draw_action_instructions(self):
         """Draw action mode instructions at top center"""
         if self.action_mode:
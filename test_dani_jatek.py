@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Tests for the game's pure helpers
+"""
+
+import os
+import time
+
+# The game opens a window and the mixer on import; keep both off screen
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from dani_jatek import (GameObject, GroundIndex, LevelCache, MOVE_LOOP, MOVE_ONCE, MOVE_PING_PONG, Player,
+                        TILE_SIZE, merge_static_rects, spike_swept_hit, swept_aabb, track_progress)
+
+
+def tile(x, y, width=TILE_SIZE, height=TILE_SIZE):
+    return {"x": x, "y": y, "width": width, "height": height}
+
+
+def covered_cells(rects):
+    cells = []
+    for x, y, width, height in rects:
+        cells += [(cx, cy) for cx in range(x, x + width, TILE_SIZE) for cy in range(y, y + height, TILE_SIZE)]
+    return cells
+
+
+# merge_static_rects
+
+def test_merge_row_becomes_one_rect():
+    merged, unaligned = merge_static_rects([tile(x, 100) for x in range(0, 100, TILE_SIZE)])
+    assert merged == [(0, 100, 100, TILE_SIZE)]
+    assert unaligned == []
+
+
+def test_merge_l_shape_covers_every_cell_once():
+    entries = [tile(0, 0, 60, 20), tile(0, 20), tile(0, 40)]
+    merged, _ = merge_static_rects(entries)
+    cells = covered_cells(merged)
+    assert sorted(cells) == sorted(set(cells))
+    assert set(cells) == {(0, 0), (20, 0), (40, 0), (0, 20), (0, 40)}
+    assert len(merged) == 2
+
+
+def test_merge_overlapping_entries_are_not_doubled():
+    merged, _ = merge_static_rects([tile(0, 0, 40, 40), tile(20, 20, 40, 40)])
+    cells = covered_cells(merged)
+    assert len(cells) == len(set(cells)) == 7
+
+
+def test_merge_leaves_unaligned_and_empty_entries_alone():
+    odd = tile(5, 0)
+    empty = tile(0, 0, 0, TILE_SIZE)
+    merged, unaligned = merge_static_rects([odd, empty, tile(40, 0)])
+    assert merged == [(40, 0, TILE_SIZE, TILE_SIZE)]
+    assert unaligned == [odd, empty]
+
+
+# swept_aabb
+
+def test_swept_catches_tunnelling_step():
+    """A move far longer than the wall is thick still hits it"""
+    player = pygame.Rect(0, 0, 20, 20)
+    wall = pygame.Rect(100, 0, 5, 20)
+    hit = swept_aabb(player, 200, 0, wall)
+    assert hit is not None
+    time_of_impact, normal_x, normal_y = hit
+    assert time_of_impact == pytest.approx(80 / 200)
+    assert (normal_x, normal_y) == (-1, 0)
+
+
+def test_swept_landing_reports_up_normal():
+    player = pygame.Rect(0, 0, 20, 20)
+    floor = pygame.Rect(-50, 40, 200, 20)
+    assert swept_aabb(player, 3, 60, floor) == (pytest.approx(20 / 60), 0, -1)
+
+
+def test_swept_misses():
+    player = pygame.Rect(0, 0, 20, 20)
+    # Parallel to the wall, never overlapping on y
+    assert swept_aabb(player, 200, 0, pygame.Rect(100, 50, 5, 20)) is None
+    # Too short to reach it this step
+    assert swept_aabb(player, 50, 0, pygame.Rect(100, 0, 5, 20)) is None
+    # Moving away
+    assert swept_aabb(player, -200, 0, pygame.Rect(100, 0, 5, 20)) is None
+
+
+def test_swept_ignores_rects_already_overlapping():
+    player = pygame.Rect(0, 0, 20, 20)
+    assert swept_aabb(player, 10, 0, pygame.Rect(10, 0, 20, 20)) is None
+
+
+# spike_swept_hit
+
+def solid_mask():
+    return pygame.mask.Mask((20, 20), fill=True)
+
+
+def test_spike_sweep_past_empty_corner_is_no_hit():
+    """Jumping past the empty top corner of a spike box crosses the box but no spike pixels"""
+    player = pygame.Rect(-23, -14, 20, 20)
+    spike = pygame.Rect(0, 0, 20, 20)
+    assert player.move(4, -4).colliderect(spike)  # The box is crossed on the way
+    assert not player.move(6, -6).colliderect(spike)
+    assert not spike_swept_hit(player, solid_mask(), 6, -6, spike)
+
+
+def test_spike_sweep_through_tips_is_a_hit():
+    spike = pygame.Rect(0, 0, 20, 20)
+    # Tunnelling: starts and ends clear of the box
+    assert spike_swept_hit(pygame.Rect(-30, -5, 20, 20), solid_mask(), 60, 0, spike)
+    # Falling onto the tips
+    assert spike_swept_hit(pygame.Rect(0, -40, 20, 20), solid_mask(), 0, 25, spike)
+    # Never near it
+    assert not spike_swept_hit(pygame.Rect(0, -60, 20, 20), solid_mask(), 0, 25, spike)
+
+
+# GroundIndex
+
+class Segment:
+    def __init__(self, left, width):
+        self.rect = pygame.Rect(left, 560, width, 40)
+
+
+def test_ground_at_segment_edges():
+    ground = GroundIndex([Segment(100, 50), Segment(0, 100)], [])
+    assert ground.ground_at(0).rect.left == 0
+    assert ground.ground_at(99).rect.left == 0
+    assert ground.ground_at(100).rect.left == 100
+    assert ground.ground_at(150) is None
+    assert ground.ground_at(-1) is None
+
+
+def test_overlapping_and_touching_pits_are_one_gap():
+    ground = GroundIndex([], [{"x": 100, "width": 100}, {"x": 150, "width": 30},
+                              {"x": 200, "width": 20}, {"x": 400, "width": 10}])
+    assert ground.pit_at(190) == (100, 220)
+    assert ground.pit_at(215) == (100, 220)
+    assert ground.pit_at(220) is None
+    assert ground.pit_at(99) is None
+    assert ground.pit_at(405) == (400, 410)
+
+
+def test_segments_in_range_is_half_open():
+    segments = [Segment(0, 100), Segment(200, 100), Segment(400, 100)]
+    ground = GroundIndex(segments, [])
+    assert [s.rect.left for s in ground.segments_in_range(100, 200)] == []
+    assert [s.rect.left for s in ground.segments_in_range(99, 201)] == [0, 200]
+    assert [s.rect.left for s in ground.segments_in_range(-50, 1000)] == [0, 200, 400]
+
+
+# track_progress
+
+def test_track_once_clamps_at_the_end():
+    assert track_progress(500, 1000, MOVE_ONCE) == (0.5, 0)
+    assert track_progress(2500, 1000, MOVE_ONCE) == (1.0, 2)
+    assert track_progress(-100, 1000, MOVE_ONCE) == (0.0, 0)
+
+
+def test_track_loop_restarts():
+    assert track_progress(1250, 1000, MOVE_LOOP) == (0.25, 1)
+    assert track_progress(2000, 1000, MOVE_LOOP) == (0.0, 2)
+
+
+def test_track_ping_pong_runs_odd_cycles_backwards():
+    assert track_progress(250, 1000, MOVE_PING_PONG) == (0.25, 0)
+    assert track_progress(1250, 1000, MOVE_PING_PONG) == (0.75, 1)
+    assert track_progress(1000, 1000, MOVE_PING_PONG) == (1.0, 1)  # Turning point
+    assert track_progress(2000, 1000, MOVE_PING_PONG) == (0.0, 2)
+
+
+def test_track_without_duration_is_finished():
+    assert track_progress(0, 0, MOVE_LOOP) == (1.0, 1)
+
+
+# LevelCache
+
+def wait_for_prefetches(cache):
+    for thread in list(cache.pending.values()):
+        thread.join()
+    while cache.pending:
+        time.sleep(0.001)
+
+
+def test_failed_prefetch_is_not_retried_until_the_map_changes():
+    calls = []
+
+    def prepare(map_name):
+        calls.append(map_name)
+        raise KeyError("yellow_blocks")
+
+    cache = LevelCache(prepare)
+    mtime = [100.0]
+    cache.map_mtime = lambda map_name: mtime[0]
+    for _ in range(20):
+        cache.prefetch("broken")
+        wait_for_prefetches(cache)
+    assert calls == ["broken"]
+
+    mtime[0] = 200.0  # Edited since
+    cache.prefetch("broken")
+    wait_for_prefetches(cache)
+    assert calls == ["broken", "broken"]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = LevelCache(lambda map_name: {"name": map_name}, capacity=2)
+    cache.map_mtime = lambda map_name: 1.0
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    assert list(cache.levels) == ["a", "c"]
+
+
+# Player spike hits
+
+def test_player_reports_swept_spike_hit_instead_of_dying():
+    """A fall straight through a spike is reported as a hit on the spike object, not a death"""
+    spike = GameObject(100, 300, 40, 20, "spikes", 1)
+    player = Player(100, 200)
+    player.vel_y = 120  # Ends well below the spike
+    result = player.update([], None, {1: spike})
+    assert result is False
+    assert player.rect.top > spike.rect.bottom
+    assert player.spike_hits == [spike]
+
+
+def test_player_clears_spike_hits_each_update():
+    spike = GameObject(100, 300, 40, 20, "spikes", 1)
+    player = Player(100, 200)
+    player.vel_y = 120
+    player.update([], None, {1: spike})
+    player.update([], None, {1: spike})
+    assert player.spike_hits == []
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Tests for the level editor's model
+"""
+
+import json
+import os
+import subprocess
+
+# The editor opens a window on import; keep it off screen
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pytest
+
+import level_editor
+
+
+@pytest.fixture
+def make_editor(tmp_path, monkeypatch):
+    """Editors whose maps directory (and so their journals) live in tmp_path"""
+    monkeypatch.setattr(level_editor, "executable_dir_path",
+                        lambda relative_path: str(tmp_path / relative_path))
+    (tmp_path / "maps").mkdir()
+    return level_editor.LevelEditor
+
+
+def write_map(maps_dir, name, **fields):
+    level = {
+        "name": name,
+        "start_position": {"x": 100, "y": 460},
+        "yellow_blocks": [],
+        "pits": [],
+        "spikes": [],
+        "trigger_boxes": [],
+        "text_elements": [],
+        "flag": {"x": 1000}
+    }
+    level.update(fields)
+    with open(os.path.join(maps_dir, f"{name}.json"), 'w') as f:
+        json.dump(level, f)
+
+
+def open_level(make_editor, name):
+    editor = make_editor()
+    editor.close_journal(delete=True)  # The unsaved startup session isn't part of these tests
+    editor.level_name = name
+    editor.load_level()
+    return editor
+
+
+def level_state(editor):
+    return json.dumps(editor.build_level_data(editor.snapshot_level()), sort_keys=True)
+
+
+# SpatialIndex
+
+def test_spatial_query_finds_objects_once_in_insertion_order():
+    index = level_editor.SpatialIndex(cell_size=100)
+    wide = {"name": "wide"}
+    small = {"name": "small"}
+    index.insert("yellow_blocks", wide, (-150, 0, 250, 50))  # Spans five cells, two negative
+    index.insert("yellow_blocks", small, (10, 10, 20, 20))
+    assert index.query("yellow_blocks", -500, -500, 500, 500) == [wide, small]
+    assert index.query_point("yellow_blocks", -120, 10) == [wide]
+    assert index.query("spikes", -500, -500, 500, 500) == []  # Lists are kept apart
+
+
+def test_spatial_right_and_bottom_edges_are_exclusive():
+    index = level_editor.SpatialIndex(cell_size=100)
+    obj = {}
+    index.insert("spikes", obj, (0, 0, 100, 100))
+    assert index.query_point("spikes", 99, 99) == [obj]
+    assert index.query_point("spikes", 100, 50) == []
+
+
+def test_spatial_remove_drops_empty_buckets():
+    index = level_editor.SpatialIndex(cell_size=100)
+    obj = {}
+    index.insert("pits", obj, (0, 0, 300, 1))
+    index.remove(obj)
+    index.remove(obj)  # Removing twice is harmless
+    assert index.cells == {}
+    assert index.entries == {}
+
+
+# Undo/redo
+
+def test_undo_and_redo_invert_every_op_kind(make_editor):
+    editor = make_editor()
+    editor.close_journal(delete=True)
+    block = {"x": 200, "y": 300, "width": 40, "height": 20, "id": 1}
+    trigger = {"x": 0, "y": 0, "width": 20, "height": 20, "id": 2, "actions": {}, "enabled": True}
+    states = [level_state(editor)]
+
+    edits = [
+        lambda: editor.add_object("yellow_blocks", block),
+        lambda: editor.add_object("trigger_boxes", trigger),
+        lambda: editor.modify_object(block, "x", 260),
+        lambda: editor.modify_object(block, "note", "new key"),  # Undo must remove it again
+        lambda: editor.modify_object(trigger, "enabled", False),
+        lambda: editor.set_flag(1500),
+        lambda: editor.set_start(300),
+        lambda: editor.remove_object("yellow_blocks", block),
+    ]
+    for edit in edits:
+        editor.begin_edit()
+        edit()
+        states.append(level_state(editor))
+
+    for state in reversed(states[:-1]):
+        editor.undo_last_action()
+        assert level_state(editor) == state
+    assert "note" not in block
+    for state in states[1:]:
+        editor.redo_last_action()
+        assert level_state(editor) == state
+
+
+def test_undo_keeps_indexes_in_step(make_editor):
+    editor = make_editor()
+    editor.close_journal(delete=True)
+    spike = {"x": 100, "y": 100, "width": 20, "height": 20, "id": 5}
+    editor.begin_edit()
+    editor.add_object("spikes", spike)
+    editor.begin_edit()
+    editor.modify_object(spike, "x", 200)
+    assert editor.cell_occupied(200, 100, "spikes")
+    assert not editor.cell_occupied(100, 100, "spikes")
+
+    editor.undo_last_action()
+    assert editor.objects_at_point("spikes", 105, 105) == [spike]
+    assert editor.objects_at_point("spikes", 205, 105) == []
+    assert editor.cell_occupied(100, 100, "spikes")
+    editor.undo_last_action()
+    assert not editor.cell_occupied(100, 100, "spikes")
+    assert "5" not in editor.objects_by_id
+
+
+def test_modify_finds_the_list_without_scanning(make_editor, monkeypatch):
+    editor = make_editor()
+    editor.close_journal(delete=True)
+    objects = {list_name: {"x": 100, "y": 100, "width": 20, "height": 20, "id": n}
+               for n, list_name in enumerate(level_editor.INDEXED_LISTS, 1)}
+    editor.begin_edit()
+    for list_name, obj in objects.items():
+        editor.add_object(list_name, obj)
+
+    def scan(items, obj):
+        raise AssertionError("modify scanned an object list")
+    monkeypatch.setattr(editor, "index_of", scan)
+    for list_name, obj in objects.items():
+        assert editor.list_containing(obj) == list_name
+        old_bounds = editor.object_bounds(list_name, obj)
+        editor.modify_object(obj, "x", 5000)
+        assert editor.spatial_index.query(list_name, *editor.object_bounds(list_name, obj)) == [obj]
+        assert editor.spatial_index.query(list_name, *old_bounds) == []
+    assert editor.list_containing({"x": 100, "y": 100, "width": 20, "height": 20}) is None
+
+
+# Spike strips
+
+def spike_cells(editor):
+    grid = level_editor.GRID_SIZE
+    return [(x, y) for spike in editor.spikes
+            for x in range(spike["x"], spike["x"] + spike["width"], grid)
+            for y in range(spike["y"], spike["y"] + spike["height"], grid)]
+
+
+def test_spike_drag_leaves_targeted_spikes_uncovered(make_editor):
+    editor = make_editor()
+    editor.close_journal(delete=True)
+    editor.current_tool = "spike"
+    editor.create_rectangle((100, 100), (100, 100))
+    targeted = editor.spikes[0]
+    editor.add_object("trigger_boxes", {"x": 0, "y": 0, "width": 20, "height": 20, "id": 99,
+                                        "actions": {str(targeted["id"]): {"action": "disappear"}}})
+
+    editor.create_rectangle((60, 60), (140, 140))
+    editor.create_rectangle((60, 60), (140, 140))  # Dragging again doesn't stack strips
+    cells = spike_cells(editor)
+    assert len(cells) == len(set(cells)) == 25
+    assert targeted in editor.spikes
+    assert [spike for spike in editor.spikes if spike["x"] == 100 and spike["y"] == 100] == [targeted]
+
+
+# Journal
+
+def test_test_save_then_quit_keeps_journal(make_editor, tmp_path, monkeypatch):
+    """Pressing T writes test_level.json only - the level's unsaved edits must survive quitting"""
+    monkeypatch.setattr(subprocess, "Popen", lambda *args, **kwargs: None)
+    write_map(tmp_path / "maps", "foo")
+    editor = open_level(make_editor, "foo")
+    editor.begin_edit()
+    editor.add_object("yellow_blocks", {"x": 200, "y": 300, "width": 40, "height": 20, "id": 7})
+    edited = level_state(editor)
+
+    editor.test_level()
+    assert editor.saved_edit_count != editor.edit_count
+    editor.shutdown()
+    assert os.path.exists(editor.journal_path_for("foo", True))
+
+    recovered = open_level(make_editor, "foo")
+    assert level_state(recovered) == edited
+
+
+def test_clean_quit_after_save_deletes_journal(make_editor, tmp_path):
+    write_map(tmp_path / "maps", "foo")
+    editor = open_level(make_editor, "foo")
+    editor.begin_edit()
+    editor.set_flag(1500)
+    editor.save_level(wait=True)
+    editor.shutdown()
+    assert not os.path.exists(editor.journal_path_for("foo", True))
+
+
+def test_new_level_edits_are_recovered_on_restart(make_editor, tmp_path):
+    """After N the session journals under the name a restart looks for"""
+    write_map(tmp_path / "maps", "foo")
+    editor = open_level(make_editor, "foo")
+    editor.new_level()
+    editor.begin_edit()
+    editor.set_flag(1500)
+    editor.sync_journal(force=True)
+    # Crash: no save, no shutdown
+
+    restarted = make_editor()
+    assert restarted.flag_x == 1500
+
+
+def test_compaction_keeps_edits_made_during_save(make_editor, tmp_path):
+    write_map(tmp_path / "maps", "foo")
+    editor = open_level(make_editor, "foo")
+    editor.begin_edit()
+    editor.set_flag(1500)
+    editor.save_level()
+    editor.begin_edit()
+    editor.set_start(300)  # Made while the save is being written
+    editor.save_thread.join()
+    editor.update_saving()
+
+    with open(editor.journal_path) as f:
+        lines = f.read().splitlines()
+    assert lines == [json.dumps(["journal", level_editor.JOURNAL_VERSION]), '["start",300]']
+    assert not os.path.exists(editor.journal_path + ".tmp")
+
+    editor.sync_journal(force=True)
+    recovered = open_level(make_editor, "foo")
+    assert (recovered.flag_x, recovered.start_x) == (1500, 300)
+
+
+def test_journal_ignores_torn_last_line(make_editor, tmp_path):
+    """A crash mid-write leaves half a record; everything before it is still replayed"""
+    write_map(tmp_path / "maps", "foo")
+    editor = open_level(make_editor, "foo")
+    editor.begin_edit()
+    editor.add_object("spikes", {"x": 100, "y": 100, "width": 20, "height": 20, "id": 3})
+    editor.begin_edit()
+    editor.set_flag(1500)
+    editor.sync_journal(force=True)
+    with open(editor.journal_path, 'a') as f:
+        f.write('["start",3')
+
+    recovered = open_level(make_editor, "foo")
+    assert recovered.flag_x == 1500
+    assert recovered.start_x == 100
+    assert [spike["id"] for spike in recovered.spikes] == [3]
+    assert recovered.next_object_id == 4
+
+
+def test_journal_replay_round_trip(make_editor, tmp_path):
+    """Objects are found by content, so edits replay even though saving reorders the lists"""
+    write_map(tmp_path / "maps", "foo",
+              spikes=[{"x": 0, "y": 540, "width": 60, "height": 20, "tile_size": 20, "id": 1},
+                      {"x": 200, "y": 540, "width": 20, "height": 20, "id": 2}],
+              pits=[{"x": 300, "width": 60}, {"x": 500, "width": 40}],
+              trigger_boxes=[{"x": 600, "y": 400, "width": 40, "height": 40, "id": 4,
+                              "actions": {}, "enabled": True}])
+    editor = open_level(make_editor, "foo")
+    saved = level_state(editor)
+    spike = next(spike for spike in editor.spikes if spike["id"] == 2)
+    trigger = editor.trigger_boxes[0]
+    edits = [
+        lambda: editor.modify_object(spike, "x", 240),
+        lambda: editor.modify_object(spike, "y", 520),
+        lambda: editor.remove_object("pits", editor.pits[0]),
+        lambda: editor.add_object("yellow_blocks", {"x": 40, "y": 200, "width": 20, "height": 20, "id": 5}),
+        lambda: editor.modify_object(trigger, "actions", {"5": {"action": "appear", "delay": 0.5}}),
+        lambda: editor.modify_object(trigger, "enabled", level_editor.MISSING),
+    ]
+    for edit in edits:
+        editor.begin_edit()
+        edit()
+    edited = level_state(editor)
+    editor.sync_journal(force=True)
+
+    recovered = open_level(make_editor, "foo")
+    assert level_state(recovered) == edited
+    recovered.undo_last_action()  # Recovery is a single undo step
+    assert level_state(recovered) == saved
+
+
+def test_journal_with_unknown_header_is_ignored(make_editor, tmp_path):
+    write_map(tmp_path / "maps", "foo")
+    with open(tmp_path / "maps" / "foo.json.journal", 'w') as f:
+        f.write('["journal",99]\n["flag",1500]\n')
+    editor = open_level(make_editor, "foo")
+    assert editor.flag_x == 1000
+
+
+def test_save_finishing_before_new_level_compacts_the_saved_journal(make_editor, tmp_path):
+    """A save that finished but wasn't reported yet belongs to the level it was taken from"""
+    write_map(tmp_path / "maps", "foo")
+    editor = open_level(make_editor, "foo")
+    editor.begin_edit()
+    editor.set_flag(1500)
+    editor.save_level()
+    editor.save_thread.join()
+
+    editor.new_level()
+    editor.begin_edit()
+    editor.set_flag(3333)
+    editor.update_saving()
+    assert editor.journal_path == editor.journal_path_for("new_level", False)
+    assert editor.saved_level_name == editor.level_name == "new_level"
+    editor.sync_journal(force=True)
+    # Crash
+
+    restarted = make_editor()
+    assert restarted.flag_x == 3333
+    recovered = open_level(make_editor, "foo")
+    assert recovered.flag_x == 1500
+
+
+def test_stale_save_status_leaves_other_journals_alone(make_editor, tmp_path):
+    write_map(tmp_path / "maps", "foo")
+    write_map(tmp_path / "maps", "bar")
+    editor = open_level(make_editor, "foo")
+    editor.begin_edit()
+    editor.set_flag(1500)
+    editor.save_level()
+    editor.save_thread.join()
+    status = editor.save_status
+
+    editor.save_status = None  # Reported later, after bar was opened
+    editor.level_name = "bar"
+    editor.load_level()
+    editor.begin_edit()
+    editor.set_start(300)
+    editor.save_status = status
+    editor.update_saving()
+    assert editor.journal_path == editor.journal_path_for("bar", True)
+    editor.sync_journal(force=True)
+
+    recovered = open_level(make_editor, "bar")
+    assert recovered.start_x == 300